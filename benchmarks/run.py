@@ -0,0 +1,181 @@
+"""Benchmarks of the execution engine.
+
+Run from the root of the repository with `python -m benchmarks.run`, optionally selecting scenarios by name:
+
+    python -m benchmarks.run --repeat 5 --output results.json small_literals batch
+
+Results are printed as JSON, so that runs on different commits can be compared.
+"""
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+from importlib import metadata
+
+from checkmate import Request, run_tests, run_batch
+from checkmate.index import TIMEOUT_SECONDS
+from checkmate.literals import literal_cache
+from checkmate.spec_check import analysis_cache
+
+
+MODES = {
+    "no_timeout": {"check_timeout": False},
+    "process": {"check_timeout": True, "execution_mode": "process"},
+    "pool": {"check_timeout": True, "execution_mode": "pool"},
+    "inline": {"check_timeout": True, "execution_mode": "inline"},
+    "fork": {"check_timeout": True, "execution_mode": "fork"},
+}
+
+
+SUM_SOURCE = """
+def f(lst):
+    total = 0
+    for x in lst:
+        total += x
+    return total
+"""
+
+
+LINKED_LIST_SOURCE = """
+def when_run(a):
+    list_sum = 0
+    while a.has_next():
+        list_sum += a.get_value()
+        a.set_value(0)
+        a.go_next()
+    list_sum += a.get_value()
+    a.set_value(0)
+    return list_sum
+"""
+
+
+TIMEOUT_SOURCE = """
+def f(x):
+    while x < 0:
+        pass
+    return x
+"""
+
+
+def sum_tests(num_tests, length):
+    return [
+        {"input_args": [repr(list(range(i, i + length)))], "output": str(sum(range(i, i + length)))}
+        for i in range(num_tests)
+    ]
+
+
+def linked_list_tests(num_tests, length):
+    return [
+        {
+            "input_args": [f"ListPtr({list(range(i, i + length))!r}, 0)"],
+            "output_args": [f"ListPtr({[0] * length!r}, None)"],
+            "output": str(sum(range(i, i + length))),
+        }
+        for i in range(num_tests)
+    ]
+
+
+def timeout_tests(num_tests, num_timeouts):
+    return [{"input_args": [str(-1 if i < num_timeouts else i)], "output": str(i)} for i in range(num_tests)]
+
+
+def batch_sources(num_sources):
+    # Distinct sources, so that each one is analyzed separately.
+    return [SUM_SOURCE.replace("total = 0", f"total = {i} - {i}") for i in range(num_sources)]
+
+
+def request_scenario(source, tests, **options):
+    request = Request(source=source, tests=tests, **options)
+    return lambda: run_tests(request), len(tests)
+
+
+def batch_scenario(sources, tests, **options):
+    return lambda: run_batch(sources, tests, **options), len(sources) * len(tests)
+
+
+def get_scenarios():
+    """Return a list of `(name, mode, run, num_tests)`, where `run` runs all tests of the scenario once."""
+    scenarios = []
+    for mode, options in MODES.items():
+        scenarios.append(("small_literals", mode, *request_scenario(SUM_SOURCE, sum_tests(20, 10), **options)))
+        scenarios.append(("large_literals", mode, *request_scenario(SUM_SOURCE, sum_tests(5, 10000), **options)))
+        linked_list_options = {**options, "is_linked_list": True, "is_level5": True}
+        linked_list_scenario = request_scenario(LINKED_LIST_SOURCE, linked_list_tests(10, 20), **linked_list_options)
+        scenarios.append(("linked_list", mode, *linked_list_scenario))
+    for mode in ["process", "pool", "fork"]:
+        options = {**MODES[mode], "max_workers": 4}
+        scenarios.append(("timeout_heavy", mode, *request_scenario(TIMEOUT_SOURCE, timeout_tests(8, 2), **options)))
+        budget_options = {**options, "line_budget": 10000}
+        budget_scenario = request_scenario(TIMEOUT_SOURCE, timeout_tests(8, 2), **budget_options)
+        scenarios.append(("timeout_heavy_line_budget", mode, *budget_scenario))
+        scenarios.append(("batch", mode, *batch_scenario(batch_sources(20), sum_tests(10, 10), **MODES[mode])))
+    return scenarios
+
+
+def measure(run, repeat):
+    timings = []
+    for _ in range(repeat):
+        # Each run starts cold, so that the numbers measure the engine rather than the caches.
+        analysis_cache.clear()
+        literal_cache.clear()
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def get_environment():
+    try:
+        version = metadata.version("checkmate")
+    except metadata.PackageNotFoundError:
+        version = None
+    return {
+        "checkmate_version": version,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "timeout_seconds": TIMEOUT_SECONDS,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the checkmate execution engine.")
+    parser.add_argument("names", nargs="*", help="names of the scenarios to run (default: all)")
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), help="execution modes to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="number of runs of each scenario")
+    parser.add_argument("--output", help="file to write the JSON results to (default: standard output)")
+    args = parser.parse_args(argv)
+
+    results = []
+    for name, mode, run, num_tests in get_scenarios():
+        if (args.names and name not in args.names) or (args.modes and mode not in args.modes):
+            continue
+        timings = measure(run, args.repeat)
+        median = statistics.median(timings)
+        results.append(
+            {
+                "name": name,
+                "mode": mode,
+                "num_tests": num_tests,
+                "timings": timings,
+                "median_seconds": median,
+                "min_seconds": min(timings),
+                "per_test_ms": 1000 * median / num_tests,
+                "tests_per_second": num_tests / median,
+            }
+        )
+        print(f"{name:<28}{mode:<12}{1000 * median / num_tests:10.2f} ms/test", file=sys.stderr)
+
+    output = json.dumps({"environment": get_environment(), "results": results}, indent=2)
+    if args.output is None:
+        print(output)
+    else:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,2 +1,3 @@
 from .types import *
-from .index import run_tests
+from .raw import RawResult
+from .index import run_tests, run_tests_async, iter_results, iter_results_async, run_batch
@@ -0,0 +1,175 @@
+"""Run the requests of a JSON Lines file, for example, to regrade many submissions offline.
+
+    python -m checkmate requests.jsonl --output results.jsonl --workers 8 --checkpoint results.checkpoint
+
+Each line of the input is a `Request`, and each line of the output is the list of its results, in the order of the
+input. Requests that are not valid get a line with an `error` object instead. With `--checkpoint`, a run that was
+interrupted continues from the last request that was written, when it is started again with the same arguments.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import collections
+from concurrent.futures import ProcessPoolExecutor
+
+from pydantic import ValidationError
+
+from .cache import SqliteCache
+from .index import run_tests
+from .types import Request
+
+
+result_cache = None
+
+
+def init_worker(cache_path):
+    global result_cache
+    if cache_path is not None:
+        result_cache = SqliteCache(cache_path)
+
+
+def run_line(line):
+    """Run the request of an input line, and return `(number of tests, output line)`."""
+    try:
+        request = Request.parse_raw(line)
+    except ValidationError as e:
+        return 0, json.dumps({"error": str(e)})
+    results = run_tests(request, result_cache, raw=True)
+    return len(results), "[" + ", ".join(result.to_json() for result in results) + "]"
+
+
+def read_checkpoint(path):
+    if path is None or not os.path.exists(path):
+        return {"input_lines": 0, "output_offset": 0}
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_checkpoint(path, input_lines, output_offset):
+    # Written to a separate file and moved, so that a crash never leaves a partial checkpoint.
+    with open(path + ".tmp", "w") as f:
+        json.dump({"input_lines": input_lines, "output_offset": output_offset}, f)
+    os.replace(path + ".tmp", path)
+
+
+def open_output(path, output_offset):
+    """Open the output for writing from `output_offset`, dropping anything written after the checkpoint."""
+    if path is None:
+        return sys.stdout.buffer
+    if output_offset == 0:
+        return open(path, "wb")
+    output = open(path, "r+b")
+    output.truncate(output_offset)
+    output.seek(output_offset)
+    return output
+
+
+def count_requests(path, skipped_lines):
+    """Count the requests of the input after the first `skipped_lines` lines, or return `None` for standard input."""
+    if path is None:
+        return None
+    with open(path, "rb") as f:
+        return sum(1 for number, line in enumerate(f, 1) if number > skipped_lines and line.strip())
+
+
+class Progress:
+    """Report the number of requests and tests done on standard error, at most once every `interval` seconds."""
+
+    def __init__(self, total, interval):
+        self.total = total
+        self.interval = interval
+        self.requests = 0
+        self.tests = 0
+        self.start = time.monotonic()
+        self.last_report = self.start
+
+    def update(self, num_tests):
+        self.requests += 1
+        self.tests += num_tests
+        if self.interval is not None and time.monotonic() - self.last_report >= self.interval:
+            self.report()
+
+    def report(self):
+        self.last_report = time.monotonic()
+        elapsed = self.last_report - self.start
+        rate = self.requests / elapsed if elapsed > 0 else 0
+        done = f"{self.requests}"
+        if self.total is not None:
+            done += f"/{self.total}"
+        print(
+            f"checkmate: {done} requests, {self.tests} tests in {elapsed:.1f}s ({rate:.1f} requests/s)",
+            file=sys.stderr,
+            flush=True,
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m checkmate", description="Run the requests of a JSON Lines file.")
+    parser.add_argument("input", nargs="?", help="file with one request per line (default: standard input)")
+    parser.add_argument("-o", "--output", help="file to write the results to (default: standard output)")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count(), help="number of worker processes")
+    parser.add_argument(
+        "--max-in-flight", type=int, help="maximum number of requests read ahead of the output (default: 2 per worker)"
+    )
+    parser.add_argument(
+        "--checkpoint", help="file to record progress in, to resume an interrupted run (needs --output)"
+    )
+    parser.add_argument("--cache", help="SQLite file to cache results in, across runs and workers")
+    parser.add_argument(
+        "--progress-interval", type=float, default=5, help="seconds between progress reports on standard error"
+    )
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not report progress")
+    args = parser.parse_args(argv)
+    if args.checkpoint is not None and args.output is None:
+        parser.error("--checkpoint needs --output")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    max_in_flight = args.max_in_flight if args.max_in_flight is not None else 2 * args.workers
+
+    checkpoint = read_checkpoint(args.checkpoint)
+    input_lines = checkpoint["input_lines"]
+    progress = Progress(count_requests(args.input, input_lines), None if args.quiet else args.progress_interval)
+    input_file = open(args.input) if args.input is not None else sys.stdin
+    output = open_output(args.output, checkpoint["output_offset"])
+    # Output lines of requests that have been submitted, in input order, with the number of the input line after them.
+    pending = collections.deque()
+
+    def write_next():
+        nonlocal input_lines
+        future, next_input_line = pending.popleft()
+        num_tests, output_line = future.result()
+        output.write(output_line.encode() + b"\n")
+        output.flush()
+        input_lines = next_input_line
+        if args.checkpoint is not None:
+            write_checkpoint(args.checkpoint, input_lines, output.tell())
+        progress.update(num_tests)
+
+    executor = ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker, initargs=(args.cache,))
+    try:
+        for number, line in enumerate(input_file, 1):
+            if number <= input_lines:
+                continue
+            if not line.strip():
+                if not pending:
+                    input_lines = number
+                continue
+            pending.append((executor.submit(run_line, line), number))
+            while len(pending) >= max_in_flight or (pending and pending[0][0].done()):
+                write_next()
+        while pending:
+            write_next()
+    finally:
+        executor.shutdown(cancel_futures=True)
+        if input_file is not sys.stdin:
+            input_file.close()
+        if output is not sys.stdout.buffer:
+            output.close()
+    if not args.quiet:
+        progress.report()
+
+
+if __name__ == "__main__":
+    main()
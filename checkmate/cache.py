@@ -0,0 +1,130 @@
+import os
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+
+class LRUCache:
+    """A thread-safe mapping that keeps at most `maxsize` entries, evicting the least recently used."""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self) -> CacheInfo:
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._data))
+
+
+class SqliteCache:
+    """A persistent string-to-string cache in an SQLite database, which can be shared by several processes."""
+
+    def __init__(self, path, timeout=30):
+        self.path = path
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._conn = None
+        self._pid = None
+        self._lock = threading.Lock()
+        with self._lock:
+            self._connection()
+
+    def _connection(self):
+        # Connections must not be shared with forked processes.
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(
+                self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False
+            )
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self._pid = os.getpid()
+        return self._conn
+
+    def __len__(self):
+        with self._lock:
+            return self._connection().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def get(self, key, default=None):
+        with self._lock:
+            row = self._connection().execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, value):
+        with self._lock:
+            self._connection().execute("INSERT OR REPLACE INTO cache (key, value) VALUES (?, ?)", (key, value))
+
+    def clear(self):
+        with self._lock:
+            self._connection().execute("DELETE FROM cache")
+            self.hits = 0
+            self.misses = 0
+
+    def info(self) -> CacheInfo:
+        return CacheInfo(self.hits, self.misses, None, len(self))
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+
+
+def normalize_source(source):
+    """Remove comments and trailing whitespace from each line of a source, keeping its line numbers.
+
+    Sources with multi-line strings or line continuations are returned unchanged,
+    because their string contents cannot be told apart from code line by line.
+    """
+    if '"""' in source or "'''" in source:
+        return source
+    lines = source.split("\n")
+    for i, line in enumerate(lines):
+        line = line.rstrip()
+        if line.endswith("\\"):
+            return source
+        if "#" in line and "'" not in line and '"' not in line:
+            line = line[: line.index("#")].rstrip()
+        lines[i] = line
+    return "\n".join(lines)
+
+
+def source_digest(source):
+    return hashlib.sha256(normalize_source(source).encode()).hexdigest()
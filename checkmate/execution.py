@@ -0,0 +1,220 @@
+import sys
+import builtins
+import time
+import signal
+import threading
+import traceback
+import functools
+from typing import Any, NamedTuple, Optional
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+class Usage(NamedTuple):
+    wall_seconds: float
+    cpu_seconds: float
+    peak_rss: Optional[int] = None
+    # The number of tests that the sandbox had run before, if it runs more than one.
+    reuses: Optional[int] = None
+
+
+class Outcome(NamedTuple):
+    output: Any = None
+    output_args: Optional[list] = None
+    error: Optional[str] = None
+    timeout: bool = False
+    # Whether the error or timeout happened in the module-level code, and so would happen for any test.
+    module_level: bool = False
+    usage: Optional[Usage] = None
+
+
+# Sent by a sandbox once the module-level code has run, so that a timeout can be attributed to the right stage.
+MODULE_LOADED = "module_loaded"
+
+
+def load_module(source):
+    # A copy of the builtins, so that replacing them only affects this execution.
+    custom_namespace = {"__builtins__": dict(vars(builtins))}
+    exec(source, custom_namespace)
+    return custom_namespace
+
+
+def string_to_lambda(source, function_name):
+    return functools.partial(load_module(source)[function_name])
+
+
+class ExecutionTimeout(BaseException):
+    pass
+
+
+def get_runtime_error_string(exc_info):
+    exc_type, exc_value, exc_traceback = exc_info
+    line_number = traceback.extract_tb(exc_traceback)[-1].lineno
+    error_string = traceback.format_exception_only(exc_type, exc_value)[-1].strip()
+    return f"Line {line_number}. {error_string}"
+
+
+class LineBudget:
+    """A trace function that raises `ExecutionTimeout` once the submission has executed more than `budget` lines.
+
+    Only frames of the submission (compiled as `"<string>"`) are counted, so the result does not depend on the
+    load of the machine, or on the implementation of the builtins and the linked list classes.
+    """
+
+    def __init__(self, budget):
+        self.remaining = budget
+
+    def trace_call(self, frame, event, arg):
+        if frame.f_code.co_filename == "<string>":
+            return self.trace_line
+        return None
+
+    def trace_line(self, frame, event, arg):
+        if event == "line":
+            self.remaining -= 1
+            if self.remaining < 0:
+                raise ExecutionTimeout
+        return self.trace_line
+
+
+def call_with_budget(fun, args, budget=None) -> Outcome:
+    """Call `fun(*args)`, counting the lines executed by the submission against `budget` (a `LineBudget`)."""
+    previous_trace = sys.gettrace()
+    if budget is not None:
+        sys.settrace(budget.trace_call)
+    try:
+        output = fun(*args)
+    except (KeyboardInterrupt, ExecutionTimeout):
+        return Outcome(timeout=True)
+    except Exception:
+        return Outcome(error=get_runtime_error_string(sys.exc_info()))
+    finally:
+        if budget is not None:
+            sys.settrace(previous_trace)
+    return Outcome(output=output, output_args=args)
+
+
+def load_with_budget(source, budget=None) -> Outcome:
+    """Execute the module-level code of a source, and return an outcome whose output is its namespace."""
+    outcome = call_with_budget(load_module, [source], budget)
+    if outcome.timeout or outcome.error is not None:
+        return outcome._replace(module_level=True)
+    return outcome
+
+
+def call_function(namespace, function_name, args, budget=None) -> Outcome:
+    def run(*args):
+        return functools.partial(namespace[function_name])(*args)
+
+    return call_with_budget(run, args, budget)
+
+
+def peak_rss():
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def measure_usage(run, *args) -> Outcome:
+    """Call `run(*args)`, which returns an outcome, and add the time and memory that it used to the outcome."""
+    start, cpu_start = time.perf_counter(), time.thread_time()
+    outcome = run(*args)
+    usage = Usage(time.perf_counter() - start, time.thread_time() - cpu_start, peak_rss())
+    return outcome._replace(usage=usage)
+
+
+def execute(source, function_name, args, line_budget=None, on_load=None, measure=False) -> Outcome:
+    """Execute a source, and call one of its functions.
+
+    `on_load` is called once the module-level code has run, before calling the function.
+    If `measure` is set, the outcome includes the `Usage` of the execution.
+    """
+    if measure:
+        return measure_usage(execute, source, function_name, args, line_budget, on_load)
+    budget = LineBudget(line_budget) if line_budget is not None else None
+    outcome = load_with_budget(source, budget)
+    if outcome.timeout or outcome.error is not None:
+        return outcome
+    if on_load is not None:
+        on_load()
+    return call_function(outcome.output, function_name, args, budget)
+
+
+def receive(conn, timeout):
+    """Receive the next message from a sandbox, skipping its `MODULE_LOADED` notice.
+
+    Returns `(timed_out, message)`, where the message is a timeout outcome if nothing arrived within `timeout` seconds,
+    which is module-level if the notice was not received either. Raises `EOFError` if the sandbox died.
+    """
+    deadline = time.monotonic() + timeout
+    loaded = False
+    while conn.poll(max(deadline - time.monotonic(), 0)):
+        message = conn.recv()
+        if isinstance(message, str) and message == MODULE_LOADED:
+            loaded = True
+            continue
+        return False, message
+    return True, Outcome(timeout=True, module_level=not loaded)
+
+
+def send_outcome(conn, outcome):
+    """Send an outcome to the parent process, or `None` if it cannot be pickled.
+
+    On `None`, the parent falls back to executing the test itself.
+    """
+    try:
+        conn.send(outcome)
+    except Exception:
+        conn.send(None)
+
+
+# After the deadline, the alarm keeps firing at this interval, in case the code swallows the exception.
+DEADLINE_RETRY_SECONDS = 0.1
+
+
+class Deadline:
+    def __init__(self):
+        self.active = True
+
+    def handle_alarm(self, signum, frame):
+        if self.active:
+            raise ExecutionTimeout
+
+
+def can_set_deadline():
+    return hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread()
+
+
+def execute_with_deadline(source, function_name, args, timeout, line_budget=None, measure=False) -> Outcome:
+    """Execute in the current process, interrupting the execution with `SIGALRM` after `timeout` seconds.
+
+    This only works in the main thread of platforms that support `signal.setitimer` (see `can_set_deadline`).
+    Code that blocks in a single C call, or that catches `BaseException` (see `SourceAnalysis.may_catch_timeouts`),
+    may not be interrupted.
+    """
+    deadline = Deadline()
+    start = time.monotonic()
+    previous_handler = signal.signal(signal.SIGALRM, deadline.handle_alarm)
+    previous_timer = signal.setitimer(signal.ITIMER_REAL, timeout, DEADLINE_RETRY_SECONDS)
+    outcome = Outcome(timeout=True)
+    try:
+        try:
+            outcome = execute(source, function_name, args, line_budget, measure=measure)
+        finally:
+            # Signal handlers only run between certain bytecodes, and none of them precede this
+            # assignment, so no alarm can raise once execution has stopped.
+            deadline.active = False
+    except ExecutionTimeout:
+        pass
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
+        previous_delay, previous_interval = previous_timer
+        if previous_delay > 0:
+            remaining = max(previous_delay - (time.monotonic() - start), 1e-3)
+            signal.setitimer(signal.ITIMER_REAL, remaining, previous_interval)
+    return outcome
@@ -0,0 +1,204 @@
+import os
+import sys
+import signal
+import threading
+import multiprocessing
+from multiprocessing.reduction import ForkingPickler
+
+from .execution import LineBudget, Outcome, call_function, load_with_budget, measure_usage, send_outcome
+from .hooks import stage
+from .monitoring import processes_started_total
+
+
+# The template enforces the timeout of each test, so its parent only waits this much longer before giving up on it.
+TEMPLATE_GRACE_SECONDS = 1
+
+
+def can_fork():
+    return hasattr(os, "fork")
+
+
+def run_child(namespace, function_name, args, budget, measure, conn):
+    try:
+        if measure:
+            outcome = measure_usage(call_function, namespace, function_name, args, budget)
+        else:
+            outcome = call_function(namespace, function_name, args, budget)
+        send_outcome(conn, outcome)
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(0)
+
+
+def template_loop(conn, source, line_budget):
+    budget = LineBudget(line_budget) if line_budget is not None else None
+    outcome = load_with_budget(source, budget)
+    if outcome.timeout or outcome.error is not None:
+        conn.send(outcome)
+        return
+    namespace = outcome.output
+    conn.send(None)
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        function_name, args, timeout, measure = job
+        reader, writer = multiprocessing.Pipe(duplex=False)
+        pid = os.fork()
+        if pid == 0:
+            reader.close()
+            child_budget = LineBudget(budget.remaining) if budget is not None else None
+            run_child(namespace, function_name, args, child_budget, measure, writer)
+        writer.close()
+        payload = None
+        if reader.poll(timeout):
+            try:
+                payload = reader.recv_bytes()
+            except EOFError:
+                pass
+        else:
+            os.kill(pid, signal.SIGKILL)
+            payload = ForkingPickler.dumps(Outcome(timeout=True))
+        os.waitpid(pid, 0)
+        reader.close()
+        # The outcome is forwarded as it is, without unpickling it in the template.
+        if payload is None:
+            conn.send(None)
+        else:
+            conn.send_bytes(payload)
+
+
+class Template:
+    """A process that has executed the module-level code of a source, and forks a child to run each test."""
+
+    def __init__(self, source, line_budget, timeout):
+        self.conn, child_conn = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(
+            target=template_loop, args=(child_conn, source, line_budget), daemon=True
+        )
+        self.process.start()
+        processes_started_total.inc("fork_template")
+        child_conn.close()
+        self.is_ready = False
+        self.init_outcome = None
+        self.jobs = 0
+        if not self.conn.poll(timeout):
+            self.kill()
+            self.init_outcome = Outcome(timeout=True, module_level=True)
+            return
+        try:
+            self.init_outcome = self.conn.recv()
+        except EOFError:
+            self.kill()
+            return
+        if self.init_outcome is None:
+            self.is_ready = True
+        else:
+            self.process.join()
+            self.conn.close()
+
+    def run(self, function_name, args, timeout, measure=False):
+        """Run a test in a fresh child of the template, and return its outcome, or `None` if there is none."""
+        self.jobs += 1
+        self.conn.send((function_name, args, timeout, measure))
+        if not self.conn.poll(timeout + TEMPLATE_GRACE_SECONDS):
+            self.kill()
+            return Outcome(timeout=True)
+        try:
+            return self.conn.recv()
+        except EOFError:
+            self.kill()
+            return None
+
+    def kill(self):
+        self.is_ready = False
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def close(self):
+        if not self.is_ready:
+            return
+        self.is_ready = False
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class ForkTemplates:
+    """The templates of one source, started lazily, so that tests running concurrently each have their own.
+
+    If the module-level code fails or times out, its outcome is used for all tests, without starting another template.
+    The templates are closed once `num_jobs` tests have finished (see `finish_job`), or on `close`.
+    """
+
+    def __init__(self, source, line_budget=None, timeout=None, num_jobs=0):
+        self.source = source
+        self.line_budget = line_budget
+        self.timeout = timeout
+        self.num_jobs = num_jobs
+        self.init_outcome = None
+        self._idle = []
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def _acquire(self):
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Templates have been closed")
+            if self._idle:
+                return self._idle.pop()
+        return Template(self.source, self.line_budget, self.timeout)
+
+    def _release(self, template):
+        with self._lock:
+            if not self._closed:
+                self._idle.append(template)
+                return
+        template.close()
+
+    def run(self, function_name, args, measure=False) -> Outcome:
+        if self.init_outcome is not None:
+            return self.init_outcome
+        with stage("launch"):
+            template = self._acquire()
+        if not template.is_ready:
+            if template.init_outcome is not None:
+                self.init_outcome = template.init_outcome
+            return template.init_outcome
+        try:
+            with stage("execute"):
+                outcome = template.run(function_name, args, self.timeout, measure)
+        except BaseException:
+            template.kill()
+            raise
+        processes_started_total.inc("fork_child")
+        if outcome is not None and outcome.usage is not None:
+            outcome = outcome._replace(usage=outcome.usage._replace(reuses=template.jobs - 1))
+        if template.is_ready:
+            self._release(template)
+        return outcome
+
+    def finish_job(self):
+        with self._lock:
+            self.num_jobs -= 1
+            done = self.num_jobs <= 0
+        if done:
+            self.close()
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for template in idle:
+            template.close()
@@ -0,0 +1,73 @@
+"""Hooks that observe the stages of running a test, e.g., to trace or profile them.
+
+A hook is notified when each stage starts and ends, on the thread that runs the stage:
+* `run_test`: running a test, from start to end, with the `function_name` and `source_digest` as details
+* `parse_args`: parsing the arguments and expected values of a test
+* `compile`: parsing, compiling and analyzing a source (only on a cache miss)
+* `spec_check`: checking a source against the specification of a test
+* `launch`: starting, or handing the test over to, the process that executes it
+* `execute`: executing the test, or waiting for the process that executes it
+* `compare`: comparing the outcome of a test with the expected values
+* `stringify`: converting values to strings for the result of a test that did not succeed
+
+Stages run in the calling process, so code executed in sandbox processes is not observed.
+When no hooks are registered, entering a stage costs a single check.
+"""
+import contextlib
+import threading
+
+
+class Hook:
+    """Base class of hooks, whose methods do nothing unless overridden.
+
+    `details` is a dictionary with information about the stage, which is shared between `start` and `end`,
+    so a hook can also use it to keep state for the stage (preferably under its own key).
+    """
+
+    def start(self, stage, details):
+        pass
+
+    def end(self, stage, details, error):
+        """`error` is the exception that ended the stage, or `None`."""
+        pass
+
+
+hooks = ()
+hooks_lock = threading.Lock()
+no_stage = contextlib.nullcontext()
+
+
+def add_hook(hook: Hook):
+    global hooks
+    with hooks_lock:
+        hooks = hooks + (hook,)
+
+
+def remove_hook(hook: Hook):
+    global hooks
+    with hooks_lock:
+        hooks = tuple(registered for registered in hooks if registered is not hook)
+
+
+class Stage:
+    def __init__(self, name, details, stage_hooks):
+        self.name = name
+        self.details = details
+        self.hooks = stage_hooks
+
+    def __enter__(self):
+        for hook in self.hooks:
+            hook.start(self.name, self.details)
+        return self.details
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        for hook in reversed(self.hooks):
+            hook.end(self.name, self.details, exc_value)
+        return False
+
+
+def stage(name, details=None):
+    """Return a context manager that notifies the registered hooks when the stage `name` starts and ends."""
+    if not hooks:
+        return no_stage
+    return Stage(name, details if details is not None else {}, hooks)
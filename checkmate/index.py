@@ -1,137 +1,762 @@
-import sys
-import traceback
-import functools
+import os
+import json
+import time
+import asyncio
+import contextlib
+import hashlib
+import threading
 import multiprocessing
+import multiprocessing.connection
 import reprlib
+from typing import AsyncIterator, Iterator, NamedTuple, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from .types import *
+from pydantic import parse_obj_as
 
-from .spec_check import check_specification, SpecificationError
+from .execution import (
+    MODULE_LOADED,
+    Outcome,
+    can_set_deadline,
+    execute,
+    execute_with_deadline,
+    receive,
+    send_outcome,
+)
+from .fork import ForkTemplates, can_fork
+from .hooks import stage
+from .monitoring import processes_started_total, record_result, result_cache_requests_total
+from .literals import get_template
+from .pool import get_pool
+from .raw import RawMetrics, RawResult
+from .spec_check import analyze_source, SpecificationError
 
 
 TIMEOUT_SECONDS = 4
+# With a line budget, the wall-clock limit is only a backstop for code that the budget cannot stop.
+BUDGET_TIMEOUT_SECONDS = 30
+# How long a sandbox may take to exit after the time limit of its test, once it has sent the outcome.
+EXIT_GRACE_SECONDS = 0.5
 
 
-myRepr = reprlib.Repr()
-myRepr.maxtuple = 10
-myRepr.maxlist = 10
-myRepr.maxarray = 10
-myRepr.maxset = 10
-myRepr.maxfrozenset = 10
-myRepr.maxdict = 10
+DEFAULT_REPR_LIMITS = ReprLimits()
+CONTAINER_TYPES = frozenset(["tuple", "list", "array", "set", "frozenset", "deque", "dict", "ListPtr"])
 
 
-def string_to_lambda(source, function_name):
-    custom_namespace = {}
-    exec(source, custom_namespace)
-    return functools.partial(custom_namespace[function_name])
+class LimitedRepr(reprlib.Repr):
+    """A `reprlib.Repr` that also limits the total length of the string.
 
+    Once the values rendered so far exceed `max_length` characters, the remaining ones are not rendered at all,
+    so that stringifying a large value costs a bounded time. Instances are not thread-safe.
+    """
+
+    def __init__(self, limits: ReprLimits):
+        super().__init__()
+        self.maxtuple = self.maxlist = self.maxarray = limits.max_list
+        self.maxset = self.maxfrozenset = self.maxdict = limits.max_list
+        self.maxstring = limits.max_string
+        self.maxlevel = limits.max_level
+        self.maxlength = limits.max_length
+        self.remaining = None
+
+    def repr(self, x):
+        self.remaining = self.maxlength
+        string = super().repr(x)
+        if self.maxlength is not None and len(string) > self.maxlength:
+            string = string[: self.maxlength - 3] + "..."
+        return string
+
+    def repr1(self, x, level):
+        if self.remaining is not None and self.remaining <= 0:
+            return "..."
+        string = super().repr1(x, level)
+        # Containers consist of the strings of their items, which are already counted.
+        if self.remaining is not None and type(x).__name__ not in CONTAINER_TYPES:
+            self.remaining -= len(string)
+        return string
+
+    def repr_ListPtr(self, x, level):
+        return f"ListPtr({self.repr1(x._lst, level - 1)}, {x._idx!r})"
+
+
+def worker(source, function_name, args, conn, line_budget=None, measure=False):
+    send_outcome(conn, execute(source, function_name, args, line_budget, lambda: conn.send(MODULE_LOADED), measure))
 
-def worker(source, function_name, args):
-    try:
-        fun = string_to_lambda(source, function_name)
-        fun(*args)
-    except Exception:
-        pass
 
+def get_timeout(line_budget):
+    return TIMEOUT_SECONDS if line_budget is None else BUDGET_TIMEOUT_SECONDS
 
-def parse_args(args, linked_list):
+
+def get_templates(args, linked_list):
     if args is None:
         return None
-    return [parse_arg(arg, linked_list) for arg in args]
+    return [get_template(arg, linked_list) if arg is not None else None for arg in args]
 
 
-def parse_arg(arg, linked_list):
-    if linked_list:
-        from .linked_list import ListPtr
-    if arg is None:
+def get_values(templates):
+    if templates is None:
         return None
-    return eval(arg)
+    return [template.value if template is not None else None for template in templates]
+
+
+class ParsedTest:
+    """A test whose arguments are parsed once into frozen templates.
+
+    Expected values are only compared, so they are used as they are, while each run gets fresh copies
+    of the input arguments.
+    """
+
+    def __init__(self, test: Test, linked_list):
+        start = time.perf_counter()
+        self.test = test
+        self.function_name = test.function_name
+        self.is_valid = True
+        self.parse_seconds = 0
+        self.strings = {}
+        try:
+            with stage("parse_args"):
+                self.input_templates = get_templates(test.input_args, linked_list)
+                self.output_args = get_values(get_templates(test.output_args, linked_list))
+                output_template = get_template(test.output, linked_list) if test.output is not None else None
+                self.output = output_template.value if output_template is not None else None
+        except Exception:
+            self.is_valid = False
+            return
+        self.input_args = get_values(self.input_templates)
+        self.parse_seconds = time.perf_counter() - start
+
+    def fresh_input_args(self):
+        return [template.copy() for template in self.input_templates]
+
+    def get_strings(self, repr_limits: Optional[ReprLimits] = None) -> dict:
+        """Return the string fields of the results of this test that do not succeed.
+
+        They are only computed once a test does not succeed, and then kept for other sources with the same limits.
+        """
+        key = repr_limits.json() if repr_limits is not None else None
+        strings = self.strings.get(key)
+        if strings is None:
+            strings = {
+                "input_args": [stringify(arg, repr_limits) for arg in self.input_args],
+                "expected_output": stringify(self.output, repr_limits),
+            }
+            if self.output_args is not None:
+                strings["expected_output_args"] = [stringify(arg, repr_limits) for arg in self.output_args]
+            self.strings[key] = strings
+        return strings
 
 
 def get_syntax_error_string(e):
     return f"Line {e.lineno}. {e.msg}"
 
 
-def get_runtime_error_string(exc_info):
-    exc_type, exc_value, exc_traceback = exc_info
-    line_number = traceback.extract_tb(exc_traceback)[-1].lineno
-    error_string = traceback.format_exception_only(exc_type, exc_value)[-1].strip()
-    return f"Line {line_number}. {error_string}"
+def stringify(value: any, repr_limits: Optional[ReprLimits] = None) -> str:
+    return LimitedRepr(repr_limits or DEFAULT_REPR_LIMITS).repr(value)
 
 
-def stringify(value: any) -> str:
-    return myRepr.repr(value)
+def run_one(
+    source,
+    test,
+    function_name,
+    is_linked_list,
+    is_level5,
+    check_timeout,
+    execution_mode=ExecutionMode.PROCESS,
+    analysis=None,
+    line_budget=None,
+    fork_templates=None,
+    module_load=None,
+    collect_metrics=False,
+    repr_limits=None,
+) -> RawResult:
+    if not isinstance(test, ParsedTest):
+        test = ParsedTest(test, is_linked_list)
+    start = time.perf_counter()
+    prepared = prepare_test(source, test, function_name, is_linked_list, is_level5, analysis)
+    spec_check_seconds = time.perf_counter() - start
+    if not isinstance(prepared, tuple):
+        if collect_metrics:
+            prepared.metrics = get_metrics(test, spec_check_seconds)
+        return prepared
+    test, analysis, function_name, arg_names = prepared
+    # The parsed input arguments are shared and must not be mutated, so they are copied before running in-process.
+    input_args = test.input_args
+    measure = collect_metrics
+    start = time.perf_counter()
+    outcome = None
+    if module_load is not None and module_load.outcome is not None:
+        outcome = module_load.outcome._replace(usage=None)
+    elif check_timeout:
+        if execution_mode == ExecutionMode.POOL:
+            outcome = run_in_pool(source, function_name, input_args, line_budget, measure)
+        elif execution_mode == ExecutionMode.FORK and fork_templates is not None:
+            outcome = run_in_template(fork_templates, source, function_name, input_args, line_budget, measure)
+        elif execution_mode == ExecutionMode.INLINE and can_set_deadline() and not analysis.may_catch_timeouts:
+            timeout = get_timeout(line_budget)
+            input_args = test.fresh_input_args()
+            with stage("execute"):
+                outcome = execute_with_deadline(
+                    analysis.code, function_name, input_args, timeout, line_budget, measure
+                )
+        else:
+            outcome = run_in_subprocess(source, function_name, input_args, line_budget, measure)
+    if outcome is None:
+        with stage("execute"):
+            outcome = execute(analysis.code, function_name, test.fresh_input_args(), line_budget, measure=measure)
+    if module_load is not None:
+        module_load.update(outcome)
+    result = check_outcome(outcome, test, function_name, arg_names, repr_limits)
+    if collect_metrics:
+        result.metrics = get_metrics(test, spec_check_seconds, outcome.usage, time.perf_counter() - start)
+    return result
 
 
-def run_one(source, test, function_name, is_linked_list, is_level5, check_timeout) -> Result:
-    try:
-        input_args = parse_args(test.input_args, linked_list=is_linked_list)
-        timeout_input_args = parse_args(test.input_args, linked_list=is_linked_list)
-        output_args = parse_args(test.output_args, linked_list=is_linked_list)
-        parsed_output = parse_arg(test.output, linked_list=is_linked_list)
-    except Exception as e:
-        return SpecificationErrorResult(error="Invalid test specification.")
-
-    error_dict = {
-        "input_args": [stringify(arg) for arg in input_args],
-        "expected_output": stringify(parsed_output),
-    }
-    if output_args is not None:
-        error_dict["expected_output_args"] = [stringify(arg) for arg in output_args]
-    try:
-        compile(source, "<string>", "exec")
-    except Exception as e:
-        error_string = get_syntax_error_string(e)
-        return SyntaxErrorResult(error=error_string)
+def get_metrics(test: ParsedTest, spec_check_seconds, usage=None, run_seconds=None) -> RawMetrics:
+    """Collect the metrics of a test, where `usage` is the `Usage` of its execution, if any.
+
+    The time to start the sandbox and hand the test over to it is the part of `run_seconds` (the time that the caller
+    waited for the outcome) that was not spent executing the source.
+    """
+    metrics = RawMetrics(parse_seconds=test.parse_seconds, spec_check_seconds=spec_check_seconds)
+    if usage is not None:
+        metrics.spawn_seconds = max(run_seconds - usage.wall_seconds, 0)
+        metrics.wall_seconds = usage.wall_seconds
+        metrics.cpu_seconds = usage.cpu_seconds
+        metrics.peak_rss = usage.peak_rss
+        metrics.sandbox_reuses = usage.reuses
+    return metrics
+
+
+def prepare_test(source, test, function_name, is_linked_list, is_level5, analysis=None):
+    """Parse a test, and check the source against its specification.
+
+    Returns the `RawResult` of the test if it cannot run, and otherwise a tuple of the parsed test, the analysis
+    of the source, the name of the function to run, and the names of its arguments.
+    """
+    if not isinstance(test, ParsedTest):
+        test = ParsedTest(test, is_linked_list)
+    if not test.is_valid:
+        return RawResult(ResultType.SPECIFICATION_ERROR, error="Invalid test specification.")
+    if analysis is None:
+        analysis = analyze_source(source)
+    if analysis.syntax_error is not None:
+        error_string = get_syntax_error_string(analysis.syntax_error)
+        return RawResult(ResultType.SYNTAX_ERROR, error=error_string)
     try:
-        function_name, arg_names = check_specification(source, input_args, function_name, is_level5)
-        error_dict["arg_names"] = arg_names
-        error_dict["function_name"] = function_name
+        with stage("spec_check"):
+            function_name, arg_names = analysis.check_specification(test.input_args, function_name, is_level5)
     except SpecificationError as e:
-        return SpecificationErrorResult(error=f"Line {e.lineno}. {str(e)}")
-    if check_timeout:
-        process = multiprocessing.Process(target=worker, args=(source, function_name, timeout_input_args))
+        return RawResult(ResultType.SPECIFICATION_ERROR, error=f"Line {e.lineno}. {str(e)}")
+    return test, analysis, function_name, arg_names
+
+
+def with_no_reuse(outcome):
+    if outcome is not None and outcome.usage is not None:
+        return outcome._replace(usage=outcome.usage._replace(reuses=0))
+    return outcome
+
+
+def join_until(process, deadline):
+    """Wait until `deadline` for a sandbox process to exit, and kill it if it is still running.
+
+    Returns whether the process exited by itself.
+    A process can outlive its test, e.g., by starting a non-daemon thread.
+    """
+    process.join(max(deadline - time.monotonic(), 0))
+    if process.exitcode is not None:
+        return True
+    process.kill()
+    process.join()
+    return False
+
+
+def run_in_subprocess(source, function_name, args, line_budget=None, measure=False):
+    deadline = time.monotonic() + get_timeout(line_budget) + EXIT_GRACE_SECONDS
+    parent_conn, child_conn = multiprocessing.Pipe(duplex=False)
+    worker_args = (source, function_name, args, child_conn, line_budget, measure)
+    process = multiprocessing.Process(target=worker, args=worker_args)
+    with stage("launch"):
         process.start()
-        process.join(TIMEOUT_SECONDS)
-        if process.is_alive():
+    processes_started_total.inc("sandbox")
+    child_conn.close()
+    with parent_conn, stage("execute"):
+        try:
+            timed_out, outcome = receive(parent_conn, get_timeout(line_budget))
+        except EOFError:
+            timed_out, outcome = False, None
+        if timed_out:
             process.terminate()
-            return TimeoutResult(**error_dict)
+    if not join_until(process, deadline):
+        # Code that is still running at the time limit counts as a timeout, even if the function has returned.
+        outcome = Outcome(timeout=True)
+    return with_no_reuse(outcome)
+
+
+async def wait_readable(waitable, timeout):
+    """Wait, without blocking the event loop, until `waitable` can be read or `timeout` expires.
+
+    Returns whether it can be read. `waitable` is a connection or a process sentinel.
+    """
+    loop = asyncio.get_running_loop()
+    readable = loop.create_future()
+    fileno = waitable if isinstance(waitable, int) else waitable.fileno()
     try:
-        fun = string_to_lambda(source, function_name)
-        result = fun(*input_args)
-    except KeyboardInterrupt:
-        return TimeoutResult(**error_dict)
+        loop.add_reader(fileno, lambda: readable.done() or readable.set_result(None))
+    except NotImplementedError:
+        # Event loops without `add_reader` (e.g., the proactor event loop on Windows) wait on a thread instead.
+        ready = await loop.run_in_executor(None, multiprocessing.connection.wait, [waitable], timeout)
+        return bool(ready)
+    try:
+        await asyncio.wait_for(readable, timeout)
+        return True
+    except asyncio.TimeoutError:
+        return False
+    finally:
+        loop.remove_reader(fileno)
+
+
+async def receive_async(conn, timeout):
+    """Like `checkmate.execution.receive`, but without blocking the event loop."""
+    deadline = time.monotonic() + timeout
+    loaded = False
+    while await wait_readable(conn, max(deadline - time.monotonic(), 0)):
+        message = conn.recv()
+        if isinstance(message, str) and message == MODULE_LOADED:
+            loaded = True
+            continue
+        return False, message
+    return True, Outcome(timeout=True, module_level=not loaded)
+
+
+async def join_until_async(process, deadline):
+    """Like `join_until`, but without blocking the event loop."""
+    exited = await wait_readable(process.sentinel, max(deadline - time.monotonic(), 0))
+    if not exited:
+        process.kill()
+    process.join()
+    return exited
+
+
+async def run_in_subprocess_async(source, function_name, args, line_budget=None, measure=False):
+    deadline = time.monotonic() + get_timeout(line_budget) + EXIT_GRACE_SECONDS
+    parent_conn, child_conn = multiprocessing.Pipe(duplex=False)
+    worker_args = (source, function_name, args, child_conn, line_budget, measure)
+    process = multiprocessing.Process(target=worker, args=worker_args)
+    with stage("launch"):
+        process.start()
+    processes_started_total.inc("sandbox")
+    child_conn.close()
+    try:
+        with parent_conn, stage("execute"):
+            try:
+                timed_out, outcome = await receive_async(parent_conn, get_timeout(line_budget))
+            except EOFError:
+                timed_out, outcome = False, None
+            if timed_out:
+                process.terminate()
+            if not await join_until_async(process, deadline):
+                outcome = Outcome(timeout=True)
+            return with_no_reuse(outcome)
+    except BaseException:
+        # Also kills the process when the awaiting task is cancelled, which then exits right away.
+        process.kill()
+        process.join()
+        raise
+
+
+def run_in_pool(source, function_name, args, line_budget=None, measure=False):
+    try:
+        return get_pool().run(source, function_name, args, get_timeout(line_budget), line_budget, measure)
     except Exception:
-        error_string = get_runtime_error_string(sys.exc_info())
-        return RuntimeErrorResult(error=error_string, **error_dict)
-    if parsed_output is not None and result != parsed_output:
-        return FailResult(
-            output=stringify(result),
-            output_args=[stringify(arg) for arg in input_args],
-            **error_dict,
-        )
+        # Arguments that cannot be sent to a pool worker get a dedicated process instead.
+        return run_in_subprocess(source, function_name, args, line_budget, measure)
+
+
+def run_in_template(fork_templates, source, function_name, args, line_budget=None, measure=False):
+    try:
+        return fork_templates.run(function_name, args, measure)
+    except Exception:
+        return run_in_subprocess(source, function_name, args, line_budget, measure)
+
+
+def outputs_match(outcome, parsed_output, output_args):
+    if parsed_output is not None and outcome.output != parsed_output:
+        return False
     if output_args is not None:
-        for i in range(len(output_args)):
-            if (output_args[i] is not None) and (input_args[i] != output_args[i]):
-                return FailResult(
-                    output=stringify(result),
-                    output_args=[stringify(arg) for arg in input_args],
-                    **error_dict,
-                )
-    return SuccessResult()
+        for expected, actual in zip(output_args, outcome.output_args):
+            if expected is not None and actual != expected:
+                return False
+    return True
+
+
+def check_outcome(outcome, test: ParsedTest, function_name, arg_names, repr_limits=None) -> RawResult:
+    """Build the result of a test from its outcome, only stringifying values if it did not succeed."""
+    if not outcome.timeout and outcome.error is None:
+        with stage("compare"):
+            if outputs_match(outcome, test.output, test.output_args):
+                return RawResult(ResultType.SUCCESS)
+    with stage("stringify"):
+        fields = dict(test.get_strings(repr_limits), function_name=function_name, arg_names=arg_names)
+        if outcome.timeout:
+            return RawResult(ResultType.TIMEOUT, **fields)
+        if outcome.error is not None:
+            return RawResult(ResultType.RUNTIME_ERROR, error=outcome.error, **fields)
+        return RawResult(
+            ResultType.FAIL,
+            output=stringify(outcome.output, repr_limits),
+            output_args=[stringify(arg, repr_limits) for arg in outcome.output_args],
+            **fields,
+        )
+
+
+def result_key(request: Request, analysis, test: Test, function_name) -> str:
+    fields = [
+        analysis.digest,
+        test.input_args,
+        test.output_args,
+        test.output,
+        function_name,
+        request.is_linked_list,
+        request.is_level5,
+        request.check_timeout,
+        request.line_budget,
+        request.repr_limits.dict() if request.repr_limits is not None else None,
+    ]
+    return hashlib.sha256(json.dumps(fields).encode()).hexdigest()
 
 
-def run_tests(request: Request) -> list[Result]:
-    results = []
-    for test in request.tests:
-        function_name = test.function_name if test.function_name is not None else request.function_name
+def get_cached_result(result_cache, key):
+    cached = result_cache.get(key)
+    return RawResult.from_json(cached) if cached is not None else None
+
+
+def cache_result(result_cache, key, result):
+    # Timeouts depend on the load of the machine, so they are always checked again.
+    if result.type != ResultType.TIMEOUT:
+        result_cache.put(key, result.to_json(exclude_metrics=True))
+
+
+def run_test(
+    request: Request, analysis, test: ParsedTest, result_cache=None, fork_templates=None, module_load=None
+) -> RawResult:
+    start = time.perf_counter()
+    function_name = test.function_name if test.function_name is not None else request.function_name
+    with stage("run_test", {"function_name": function_name, "source_digest": analysis.digest}):
+        if result_cache is not None:
+            key = result_key(request, analysis, test.test, function_name)
+            cached = get_cached_result(result_cache, key)
+            result_cache_requests_total.inc("hit" if cached is not None else "miss")
+            if cached is not None:
+                record_result(cached, time.perf_counter() - start)
+                return cached
         result = run_one(
-            request.source.strip(),
+            analysis.source,
             test,
             function_name,
             request.is_linked_list,
             request.is_level5,
             request.check_timeout,
+            request.execution_mode,
+            analysis,
+            request.line_budget,
+            fork_templates,
+            module_load,
+            request.collect_metrics,
+            request.repr_limits,
         )
-        results.append(result)
+        if result_cache is not None:
+            cache_result(result_cache, key, result)
+        record_result(result, time.perf_counter() - start)
+        return result
+
+
+async def run_test_async(
+    request: Request, analysis, test: ParsedTest, result_cache=None, module_load=None
+) -> RawResult:
+    start = time.perf_counter()
+    function_name = test.function_name if test.function_name is not None else request.function_name
+    with stage("run_test", {"function_name": function_name, "source_digest": analysis.digest}):
+        if result_cache is not None:
+            key = result_key(request, analysis, test.test, function_name)
+            cached = get_cached_result(result_cache, key)
+            result_cache_requests_total.inc("hit" if cached is not None else "miss")
+            if cached is not None:
+                record_result(cached, time.perf_counter() - start)
+                return cached
+        result = await run_one_async(request, analysis, test, function_name, module_load)
+        if result_cache is not None:
+            cache_result(result_cache, key, result)
+        record_result(result, time.perf_counter() - start)
+        return result
+
+
+async def run_one_async(request: Request, analysis, test: ParsedTest, function_name, module_load=None) -> RawResult:
+    """Like `run_one`, but waiting on the process of the test without blocking the event loop."""
+    measure = request.collect_metrics
+    start = time.perf_counter()
+    prepared = prepare_test(analysis.source, test, function_name, request.is_linked_list, request.is_level5, analysis)
+    spec_check_seconds = time.perf_counter() - start
+    if isinstance(prepared, tuple):
+        test, analysis, function_name, arg_names = prepared
+        start = time.perf_counter()
+        outcome = None
+        if module_load is not None and module_load.outcome is not None:
+            outcome = module_load.outcome._replace(usage=None)
+        elif request.check_timeout:
+            args = (analysis.source, function_name, test.input_args, request.line_budget, measure)
+            outcome = await run_in_subprocess_async(*args)
+        if outcome is None:
+            with stage("execute"):
+                outcome = execute(
+                    analysis.code, function_name, test.fresh_input_args(), request.line_budget, measure=measure
+                )
+        if module_load is not None:
+            module_load.update(outcome)
+        result = check_outcome(outcome, test, function_name, arg_names, request.repr_limits)
+        if measure:
+            result.metrics = get_metrics(test, spec_check_seconds, outcome.usage, time.perf_counter() - start)
+    else:
+        result = prepared
+        if measure:
+            result.metrics = get_metrics(test, spec_check_seconds)
+    return result
+
+
+class EarlyStop:
+    """Track the results of the tests of one source, to skip its remaining tests once the request's policy says so.
+
+    Tests that are already running when the policy triggers still finish, so with `Request.max_workers`,
+    more failures than the limit can be reported.
+    """
+
+    def __init__(self, request: Request):
+        max_failures = [request.stop_after_n_failures, 1 if request.stop_on_first_failure else None]
+        max_failures = [value for value in max_failures if value is not None]
+        self.max_failures = min(max_failures) if max_failures else None
+        self.skip_on_error = request.skip_remaining_on_syntax_or_spec_error
+        self.is_enabled = self.max_failures is not None or self.skip_on_error
+        self.failures = 0
+        self.stopped = False
+        self._lock = threading.Lock()
+
+    def update(self, result):
+        with self._lock:
+            if result.type == ResultType.SUCCESS:
+                return
+            self.failures += 1
+            if self.max_failures is not None and self.failures >= self.max_failures:
+                self.stopped = True
+            if self.skip_on_error and result.type in (ResultType.SYNTAX_ERROR, ResultType.SPECIFICATION_ERROR):
+                self.stopped = True
+
+
+class ModuleLoad:
+    """The outcome of the module-level code of a source, once a test has shown that it fails or times out.
+
+    The module-level code does not depend on the test, so the remaining tests of the source reuse that outcome
+    instead of executing the source again.
+    """
+
+    def __init__(self):
+        self.outcome = None
+
+    def update(self, outcome):
+        if outcome.module_level and self.outcome is None:
+            self.outcome = outcome
+
+
+def skip() -> RawResult:
+    result = RawResult(ResultType.SKIPPED)
+    record_result(result)
+    return result
+
+
+class Job(NamedTuple):
+    request: Request
+    analysis: object
+    test: ParsedTest
+    early_stop: Optional[EarlyStop] = None
+    module_load: Optional[ModuleLoad] = None
+
+
+def make_jobs(request: Request, analysis, tests):
+    early_stop = EarlyStop(request)
+    if not early_stop.is_enabled:
+        early_stop = None
+    module_load = ModuleLoad()
+    return [Job(request, analysis, test, early_stop, module_load) for test in tests]
+
+
+def get_fork_templates(jobs):
+    """Create the (lazily started) templates of each source that runs in the `fork` execution mode."""
+    fork_templates = {}
+    if not can_fork():
+        return fork_templates
+    for request, analysis, *_ in jobs:
+        if request.check_timeout and request.execution_mode == ExecutionMode.FORK and analysis.syntax_error is None:
+            if analysis.digest not in fork_templates:
+                timeout = get_timeout(request.line_budget)
+                fork_templates[analysis.digest] = ForkTemplates(analysis.source, request.line_budget, timeout)
+            fork_templates[analysis.digest].num_jobs += 1
+    return fork_templates
+
+
+def iter_jobs(jobs, max_workers, result_cache=None) -> Iterator[tuple[int, RawResult]]:
+    """Run jobs, and yield `(index, result)` as each of them finishes, in order of completion."""
+    fork_templates = get_fork_templates(jobs)
+
+    def run_job(job):
+        templates = fork_templates.get(job.analysis.digest)
+        try:
+            if job.early_stop is not None and job.early_stop.stopped:
+                return skip()
+            result = run_test(job.request, job.analysis, job.test, result_cache, templates, job.module_load)
+            if job.early_stop is not None:
+                job.early_stop.update(result)
+            return result
+        finally:
+            if templates is not None:
+                templates.finish_job()
+
+    try:
+        if max_workers is not None and max_workers > 1:
+            # Tests execute in separate processes, so threads are enough to wait on them concurrently.
+            executor = ThreadPoolExecutor(max_workers=max_workers)
+            try:
+                futures = {executor.submit(run_job, job): index for index, job in enumerate(jobs)}
+                for future in as_completed(futures):
+                    yield futures[future], future.result()
+            finally:
+                # Jobs that have not started yet are dropped if the caller stops iterating early.
+                executor.shutdown(cancel_futures=True)
+        else:
+            for index, job in enumerate(jobs):
+                yield index, run_job(job)
+    finally:
+        for templates in fork_templates.values():
+            templates.close()
+
+
+def run_jobs(jobs, max_workers, result_cache=None) -> list[RawResult]:
+    results = [None] * len(jobs)
+    for index, result in iter_jobs(jobs, max_workers, result_cache):
+        results[index] = result
     return results
+
+
+def get_jobs(request: Request):
+    analysis = analyze_source(request.source.strip())
+    max_workers = request.max_workers if request.check_timeout else None
+    tests = [ParsedTest(test, request.is_linked_list) for test in request.tests]
+    return make_jobs(request, analysis, tests), max_workers
+
+
+def convert(result: RawResult, raw):
+    return result if raw else result.to_model()
+
+
+def iter_models(items):
+    with contextlib.closing(items):
+        for index, result in items:
+            yield index, result.to_model()
+
+
+def run_tests(request: Request, result_cache=None, raw=False) -> list[Result]:
+    """Run the tests of a request.
+
+    If a `result_cache` is given (e.g., a `checkmate.cache.LRUCache` or `checkmate.cache.SqliteCache`),
+    results of tests that have already been run on an equivalent source are taken from it instead.
+    If `raw` is set, results are returned as `checkmate.raw.RawResult`, without building the pydantic models.
+    """
+    jobs, max_workers = get_jobs(request)
+    return [convert(result, raw) for result in run_jobs(jobs, max_workers, result_cache)]
+
+
+def iter_results(request: Request, result_cache=None, raw=False) -> Iterator[tuple[int, Result]]:
+    """Run the tests of a request, and yield `(index, result)` as each test finishes.
+
+    When tests run in parallel, results are yielded in order of completion,
+    which may differ from the order of the tests.
+    """
+    jobs, max_workers = get_jobs(request)
+    items = iter_jobs(jobs, max_workers, result_cache)
+    return items if raw else iter_models(items)
+
+
+async def iter_results_async(request: Request, result_cache=None, raw=False) -> AsyncIterator[tuple[int, Result]]:
+    """Run the tests of a request, and yield `(index, result)` as each test finishes, without blocking the event loop.
+
+    Only the default `"process"` execution mode waits natively, and kills the processes of the running tests
+    if the iteration is cancelled or stopped early. The other modes run `iter_results` on a thread, which stops
+    starting tests once the iteration ends, but lets the test that is running finish.
+    """
+    loop = asyncio.get_running_loop()
+    if request.check_timeout and request.execution_mode != ExecutionMode.PROCESS:
+        results = iter_results(request, result_cache, raw)
+        # A single thread, so that the results are never advanced and closed at the same time.
+        executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            while True:
+                item = await loop.run_in_executor(executor, next, results, None)
+                if item is None:
+                    return
+                yield item
+        finally:
+            executor.submit(results.close)
+            executor.shutdown(wait=False)
+    jobs, max_workers = get_jobs(request)
+    semaphore = asyncio.Semaphore(max_workers if max_workers is not None else 1)
+
+    async def run_job(index, job):
+        async with semaphore:
+            if job.early_stop is not None and job.early_stop.stopped:
+                return index, skip()
+            result = await run_test_async(job.request, job.analysis, job.test, result_cache, job.module_load)
+            if job.early_stop is not None:
+                job.early_stop.update(result)
+            return index, result
+
+    tasks = [asyncio.ensure_future(run_job(index, job)) for index, job in enumerate(jobs)]
+    try:
+        for next_result in asyncio.as_completed(tasks):
+            index, result = await next_result
+            yield index, convert(result, raw)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def run_tests_async(request: Request, result_cache=None, raw=False) -> list[Result]:
+    """Run the tests of a request, waiting on their processes without blocking the event loop.
+
+    In the default `"process"` execution mode, the processes of the running tests are killed if the awaiting task
+    is cancelled, while the other modes let the running test finish (see `iter_results_async`).
+    """
+    results = [None] * len(request.tests)
+    async for index, result in iter_results_async(request, result_cache, raw):
+        results[index] = result
+    return results
+
+
+def run_batch(
+    sources: list[str], tests: list[Test], result_cache=None, raw=False, **options
+) -> list[list[Result]]:
+    """Run the same tests on each of the given sources.
+
+    The tests are validated and parsed only once, and the keyword arguments are the remaining `Request` fields.
+    Results are grouped by source, in the order of `sources`.
+    """
+    unknown_options = set(options) - (set(Request.__fields__) - {"source", "tests"})
+    if unknown_options:
+        raise TypeError(f"Unexpected keyword arguments: {', '.join(sorted(unknown_options))}")
+    request = Request(source="", tests=[], **options)
+    tests = [ParsedTest(test, request.is_linked_list) for test in parse_obj_as(list[Test], tests)]
+    max_workers = None
+    # Inline tests interrupt themselves with a timer on the main thread, so they always run one at a time.
+    if request.check_timeout and request.execution_mode != ExecutionMode.INLINE:
+        max_workers = request.max_workers if request.max_workers is not None else os.cpu_count()
+    analyses = [analyze_source(source.strip()) for source in sources]
+    jobs = [job for analysis in analyses for job in make_jobs(request, analysis, tests)]
+    results = [convert(result, raw) for result in run_jobs(jobs, max_workers, result_cache)]
+    num_tests = len(tests)
+    return [results[i * num_tests : (i + 1) * num_tests] for i in range(len(sources))]
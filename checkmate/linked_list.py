@@ -1,40 +1,59 @@
-import inspect
+import sys
 
 
 class LinkedListError(Exception):
     pass
 
 
+def caller_lineno():
+    """Return the line number of the code that called the `ListPtr` method that calls this function."""
+    return sys._getframe(2).f_lineno
+
+
 class ListPtr:
+    __slots__ = ("_lst", "_idx")
+
+    MAX_VAL = 99
+    MIN_VAL = -99
+
     def __init__(self, lst, start_idx=0):
         self._lst = list(lst)
         self._idx = start_idx
-        self._MAX_VAL = 99
-        self._MIN_VAL = -99
+
+    def copy(self):
+        copied = ListPtr.__new__(ListPtr)
+        copied._lst = self._lst[:]
+        copied._idx = self._idx
+        return copied
+
+    __copy__ = copy
+
+    def __reduce__(self):
+        return ListPtr, (self._lst, self._idx)
 
     def __eq__(self, other):
+        if self is other:
+            return True
         if not isinstance(other, ListPtr):
             return False
-        if self._idx is None or other._idx is None:
+        if self._idx is None or other._idx is None or self._idx == other._idx:
             return self._lst == other._lst
-        return self._lst == other._lst and self._idx == other._idx
+        return False
 
     def __repr__(self):
-        return f"ListPtr({self._lst}, {self._idx})"
+        return f"ListPtr({self._lst!r}, {self._idx!r})"
 
     def go_next(self):
         if self._idx < len(self._lst) - 1:
             self._idx += 1
         else:
-            caller_lineno = inspect.getframeinfo(inspect.stack()[1][0]).lineno
-            raise LinkedListError(f"Line {caller_lineno}: Cannot 'go_next' at the end of linked list")
+            raise LinkedListError(f"Line {caller_lineno()}: Cannot 'go_next' at the end of linked list")
 
     def go_prev(self):
         if self._idx > 0:
             self._idx -= 1
         else:
-            caller_lineno = inspect.getframeinfo(inspect.stack()[1][0]).lineno
-            raise LinkedListError(f"Line {caller_lineno}: Cannot 'go_prev' at the start of linked list")
+            raise LinkedListError(f"Line {caller_lineno()}: Cannot 'go_prev' at the start of linked list")
 
     def has_next(self):
         return self._idx < len(self._lst) - 1
@@ -46,8 +65,7 @@ class ListPtr:
         return self._lst[self._idx]
 
     def set_value(self, value):
-        if isinstance(value, int) and self._MIN_VAL <= value <= self._MAX_VAL:
+        if isinstance(value, int) and ListPtr.MIN_VAL <= value <= ListPtr.MAX_VAL:
             self._lst[self._idx] = value
         else:
-            caller_lineno = inspect.getframeinfo(inspect.stack()[1][0]).lineno
-            raise LinkedListError(f"Line {caller_lineno}: List values must be integers between -99 and 99")
+            raise LinkedListError(f"Line {caller_lineno()}: List values must be integers between -99 and 99")
@@ -0,0 +1,106 @@
+import ast
+import copy
+
+from .cache import LRUCache
+from .linked_list import ListPtr
+
+
+IMMUTABLE_TYPES = frozenset([type(None), bool, int, float, complex, str, bytes, frozenset])
+
+
+class Template:
+    """The frozen value of a test argument, from which fresh copies are made for each use.
+
+    Values built from literals cannot contain shared references, so they are copied with `copy_literal`,
+    which is much cheaper than `copy.deepcopy` for large nested values.
+    """
+
+    def __init__(self, value, is_literal):
+        self.value = value
+        self.is_literal = is_literal
+
+    def copy(self):
+        if self.is_literal:
+            return copy_literal(self.value)
+        return copy.deepcopy(self.value)
+
+
+def copy_list(value):
+    return [item if type(item) in IMMUTABLE_TYPES else copy_literal(item) for item in value]
+
+
+def copy_tuple(value):
+    copied = tuple(item if type(item) in IMMUTABLE_TYPES else copy_literal(item) for item in value)
+    return value if all(a is b for a, b in zip(copied, value)) else copied
+
+
+def copy_dict(value):
+    return {key: item if type(item) in IMMUTABLE_TYPES else copy_literal(item) for key, item in value.items()}
+
+
+COPIERS = {
+    list: copy_list,
+    tuple: copy_tuple,
+    dict: copy_dict,
+    set: set.copy,
+    ListPtr: ListPtr.copy,
+}
+
+
+def copy_literal(value):
+    value_type = type(value)
+    if value_type in IMMUTABLE_TYPES:
+        return value
+    copier = COPIERS.get(value_type)
+    if copier is None:
+        return copy.deepcopy(value)
+    return copier(value)
+
+
+literal_cache = LRUCache(maxsize=4096)
+
+
+def is_literal_list_ptr(node):
+    return (
+        isinstance(node, ast.Call)
+        and isinstance(node.func, ast.Name)
+        and node.func.id == "ListPtr"
+        and not node.keywords
+        and 1 <= len(node.args) <= 2
+    )
+
+
+def evaluate(arg, linked_list) -> Template:
+    """Evaluate a test argument string.
+
+    Plain literals go through `ast.literal_eval`, and `ListPtr(...)` calls with literal arguments are
+    constructed directly. Anything else falls back to `eval`, with only the builtins (and `ListPtr`) in scope.
+    """
+    tree = ast.parse(arg.strip(), mode="eval")
+    try:
+        return Template(ast.literal_eval(tree.body), is_literal=True)
+    except ValueError:
+        pass
+    namespace = {}
+    if linked_list:
+        if is_literal_list_ptr(tree.body):
+            try:
+                return Template(ListPtr(*[ast.literal_eval(node) for node in tree.body.args]), is_literal=True)
+            except ValueError:
+                pass
+        namespace["ListPtr"] = ListPtr
+    return Template(eval(compile(tree, "<string>", "eval"), namespace), is_literal=False)
+
+
+def get_template(arg, linked_list) -> Template:
+    """Return the template of a test argument string, evaluating each string only once."""
+    key = (arg, linked_list)
+    template = literal_cache.get(key)
+    if template is None:
+        template = evaluate(arg, linked_list)
+        literal_cache.put(key, template)
+    return template
+
+
+def parse_literal(arg, linked_list):
+    return get_template(arg, linked_list).copy()
@@ -0,0 +1,232 @@
+"""Operational metrics of a long-running grader, in the Prometheus exposition format.
+
+The metrics of this process are kept in `registry`, which is updated as tests run, and can be rendered with
+`registry.render()`, taken as a dictionary with `registry.snapshot()`, or served over HTTP with `serve`.
+"""
+import math
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .literals import literal_cache
+from .spec_check import analysis_cache
+
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{escape_label_value(value)}"' for name, value in labels) + "}"
+
+
+def escape_label_value(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def labels_of(self, labelvalues):
+        if len(labelvalues) != len(self.labelnames):
+            raise ValueError(f"Metric '{self.name}' expects labels {self.labelnames}, but was given {labelvalues}")
+        return tuple(zip(self.labelnames, (str(value) for value in labelvalues)))
+
+    def samples(self):
+        """Return a list of `(suffix, labels, value)`."""
+        raise NotImplementedError
+
+    def snapshot(self):
+        return [{"labels": dict(labels), "value": value} for _, labels, value in self.samples()]
+
+
+class Counter(Metric):
+    """A value that only increases, optionally computed by `function` when collected.
+
+    `function` returns a dictionary from tuples of label values to values.
+    """
+
+    type = "counter"
+
+    def __init__(self, name, documentation, labelnames=(), function=None):
+        super().__init__(name, documentation, labelnames)
+        self.function = function
+        self._values = {}
+
+    def inc(self, *labelvalues, amount=1):
+        labels = self.labels_of(labelvalues)
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def get(self, *labelvalues):
+        return dict(self.values()).get(self.labels_of(labelvalues), 0)
+
+    def values(self):
+        if self.function is not None:
+            return [(self.labels_of(labelvalues), value) for labelvalues, value in self.function().items()]
+        with self._lock:
+            return list(self._values.items())
+
+    def samples(self):
+        return [("", labels, value) for labels, value in self.values()]
+
+
+class Gauge(Counter):
+    """A value that can go up and down, optionally computed by `function` when collected."""
+
+    type = "gauge"
+
+    def set(self, *labelvalues, value):
+        labels = self.labels_of(labelvalues)
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._counts = [0] * len(self.buckets)
+        self._sum = 0
+        self._count = 0
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def samples(self):
+        with self._lock:
+            counts, total, count = list(self._counts), self._sum, self._count
+        samples = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            samples.append(("_bucket", (("le", format_value(bound)),), cumulative))
+        samples.append(("_sum", (), total))
+        samples.append(("_count", (), count))
+        return samples
+
+    def snapshot(self):
+        samples = self.samples()
+        buckets = {dict(labels)["le"]: value for suffix, labels, value in samples if suffix == "_bucket"}
+        return {"buckets": buckets, "sum": samples[-2][2], "count": samples[-1][2]}
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+
+    def register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric '{metric.name}' is already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for suffix, labels, value in metric.samples():
+                lines.append(f"{metric.name}{suffix}{format_labels(labels)} {format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        return {name: metric.snapshot() for name, metric in self.metrics.items()}
+
+
+def get_cache_stats(kind):
+    stats = {}
+    for name, cache in [("analysis", analysis_cache), ("literal", literal_cache)]:
+        info = cache.info()
+        stats[(name,)] = info.hits if kind == "hits" else info.misses
+    return stats
+
+
+def get_pool_stats():
+    # The pool module records its own metrics, so it is imported here to avoid a circular import.
+    from .pool import get_pool_occupancy
+
+    busy, idle = get_pool_occupancy()
+    return {("busy",): busy, ("idle",): idle}
+
+
+registry = Registry()
+tests_total = registry.register(Counter("checkmate_tests_total", "Tests run, by result type.", ["type"]))
+test_duration_seconds = registry.register(
+    Histogram("checkmate_test_duration_seconds", "Time to run a test, including parsing and checking it.")
+)
+processes_started_total = registry.register(
+    Counter("checkmate_processes_started_total", "Processes started to execute tests, by kind.", ["kind"])
+)
+result_cache_requests_total = registry.register(
+    Counter("checkmate_result_cache_requests_total", "Lookups in result caches, by outcome.", ["outcome"])
+)
+cache_hits_total = registry.register(
+    Counter("checkmate_cache_hits_total", "Hits of the internal caches.", ["cache"], lambda: get_cache_stats("hits"))
+)
+cache_misses_total = registry.register(
+    Counter(
+        "checkmate_cache_misses_total", "Misses of the internal caches.", ["cache"], lambda: get_cache_stats("misses")
+    )
+)
+pool_workers = registry.register(
+    Gauge("checkmate_pool_workers", "Workers of the default worker pool, by state.", ["state"], get_pool_stats)
+)
+
+
+def record_result(result, seconds=None):
+    tests_total.inc(result.type.value)
+    if seconds is not None:
+        test_duration_seconds.observe(seconds)
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    registry = registry
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port=9090, host="127.0.0.1", metrics_registry=None) -> ThreadingHTTPServer:
+    """Serve the metrics at `http://host:port/metrics` on a daemon thread, and return the server.
+
+    Call `shutdown()` on the server to stop it.
+    """
+    handler = type("Handler", (MetricsHandler,), {"registry": metrics_registry or registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
@@ -0,0 +1,264 @@
+import os
+import sys
+import dis
+import atexit
+import builtins
+import threading
+import multiprocessing
+from multiprocessing.reduction import ForkingPickler
+
+from . import linked_list
+from .execution import MODULE_LOADED, Outcome, execute, receive, send_outcome
+from .hooks import stage
+from .monitoring import processes_started_total
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+DEFAULT_MAX_JOBS = 100
+DEFAULT_MAX_MEMORY = 256 * 1024 * 1024
+
+
+def current_rss():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    if resource is None:
+        return 0
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def has_imports(code):
+    for instruction in dis.get_instructions(code):
+        if instruction.opname == "IMPORT_NAME" or instruction.argval == "__import__":
+            return True
+    return any(has_imports(const) for const in code.co_consts if hasattr(const, "co_code"))
+
+
+def snapshot_state(imports):
+    """Take a shallow snapshot of the state that a job could change for later jobs on the same worker.
+
+    Without imports, a job can only reach the builtins (through their module) and the linked list classes.
+    With imports, it can reach any loaded module, so all of them are included, as well as the recursion limit.
+    """
+    namespaces = [builtins, linked_list, linked_list.ListPtr]
+    if imports:
+        namespaces.extend(sys.modules.values())
+    return set(sys.modules), sys.getrecursionlimit(), [(namespace, dict(vars(namespace))) for namespace in namespaces]
+
+
+def is_changed(namespace, values):
+    current = vars(namespace)
+    return current.keys() != values.keys() or any(current[name] is not value for name, value in values.items())
+
+
+def restore_state(snapshot):
+    """Restore the namespaces of a snapshot, and return whether the state of the worker had changed.
+
+    Restoring keeps the worker able to report the outcome of the job, even if the job replaced a builtin.
+    Threads that the job left running cannot be stopped, and would slow down later jobs, so they count as a change.
+    """
+    module_names, recursion_limit, namespaces = snapshot
+    changed = module_names != sys.modules.keys() or threading.active_count() > 1
+    if sys.getrecursionlimit() != recursion_limit:
+        changed = True
+        sys.setrecursionlimit(recursion_limit)
+    for namespace, values in namespaces:
+        if not is_changed(namespace, values):
+            continue
+        changed = True
+        if isinstance(namespace, type):
+            for name in vars(namespace).keys() - values.keys():
+                delattr(namespace, name)
+            for name, value in values.items():
+                if vars(namespace).get(name) is not value:
+                    setattr(namespace, name, value)
+        else:
+            current = vars(namespace)
+            for name in current.keys() - values.keys():
+                del current[name]
+            current.update(values)
+    return changed
+
+
+def worker_loop(conn, max_memory):
+    baseline_rss = current_rss()
+    last_source, last_code, last_imports = None, None, False
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        source, function_name, args, line_budget, measure = job
+        if source != last_source:
+            # Consecutive jobs usually come from the same request, so only the last compiled source is kept.
+            last_source, last_code = source, compile(source, "<string>", "exec")
+            last_imports = has_imports(last_code)
+        snapshot = snapshot_state(last_imports)
+        outcome = execute(last_code, function_name, args, line_budget, lambda: conn.send(MODULE_LOADED), measure)
+        # A job that changed modules or builtins would affect the grades of later jobs, so its worker is replaced.
+        retire = restore_state(snapshot)
+        retire = retire or (max_memory is not None and current_rss() - baseline_rss > max_memory)
+        conn.send(retire)
+        send_outcome(conn, outcome)
+
+
+class Worker:
+    def __init__(self, max_memory):
+        self.conn, child_conn = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=worker_loop, args=(child_conn, max_memory), daemon=True)
+        self.process.start()
+        processes_started_total.inc("pool_worker")
+        child_conn.close()
+        self.jobs = 0
+
+    def run(self, payload, timeout):
+        """Run a pickled job and return `(outcome, reusable)`.
+
+        The outcome is `None` if the worker died or its outcome could not be pickled.
+        """
+        self.jobs += 1
+        self.conn.send_bytes(payload)
+        try:
+            timed_out, message = receive(self.conn, timeout)
+            if timed_out:
+                self.kill()
+                return message, False
+            retire = message
+            outcome = self.conn.recv()
+        except EOFError:
+            self.kill()
+            return None, False
+        return outcome, not retire
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def close(self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class WorkerPool:
+    """A pool of long-lived worker processes that execute submissions.
+
+    Workers are started lazily, reused across tests and `run_tests` calls, and replaced
+    after a timeout, after a job that changed loaded modules or builtins, after `max_jobs` jobs,
+    or once their memory has grown by more than `max_memory` bytes since they started.
+    """
+
+    def __init__(self, size=None, max_jobs=DEFAULT_MAX_JOBS, max_memory=DEFAULT_MAX_MEMORY):
+        self.size = size if size is not None else (os.cpu_count() or 1)
+        self.max_jobs = max_jobs
+        self.max_memory = max_memory
+        self._idle = []
+        self._num_workers = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def _acquire(self):
+        with self._cond:
+            while not self._closed and not self._idle and self._num_workers >= self.size:
+                self._cond.wait()
+            if self._closed:
+                raise RuntimeError("Worker pool has been shut down")
+            if self._idle:
+                return self._idle.pop()
+            self._num_workers += 1
+        try:
+            return Worker(self.max_memory)
+        except BaseException:
+            self._release(None)
+            raise
+
+    def _release(self, worker):
+        with self._cond:
+            if worker is None:
+                self._num_workers -= 1
+            elif self._closed:
+                self._num_workers -= 1
+                worker.close()
+            else:
+                self._idle.append(worker)
+            self._cond.notify()
+
+    def run(self, source, function_name, args, timeout, line_budget=None, measure=False) -> Outcome:
+        payload = ForkingPickler.dumps((source, function_name, args, line_budget, measure))
+        with stage("launch"):
+            worker = self._acquire()
+        try:
+            with stage("execute"):
+                outcome, reusable = worker.run(payload, timeout)
+        except BaseException:
+            worker.kill()
+            self._release(None)
+            raise
+        if outcome is not None and outcome.usage is not None:
+            outcome = outcome._replace(usage=outcome.usage._replace(reuses=worker.jobs - 1))
+        if worker.jobs >= self.max_jobs:
+            reusable = False
+        if not reusable and worker.process.is_alive():
+            worker.close()
+        self._release(worker if reusable else None)
+        return outcome
+
+    def occupancy(self):
+        """Return the numbers of busy and idle workers."""
+        with self._cond:
+            return self._num_workers - len(self._idle), len(self._idle)
+
+    def shutdown(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._num_workers -= len(idle)
+            self._cond.notify_all()
+        for worker in idle:
+            worker.close()
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def get_pool() -> WorkerPool:
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = WorkerPool()
+            atexit.register(_default_pool.shutdown)
+        return _default_pool
+
+
+def get_pool_occupancy():
+    """Return the numbers of busy and idle workers of the default pool, without starting it."""
+    pool = _default_pool
+    return pool.occupancy() if pool is not None else (0, 0)
+
+
+def configure_pool(size=None, max_jobs=DEFAULT_MAX_JOBS, max_memory=DEFAULT_MAX_MEMORY) -> WorkerPool:
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is not None:
+            _default_pool.shutdown()
+            atexit.unregister(_default_pool.shutdown)
+        _default_pool = WorkerPool(size, max_jobs, max_memory)
+        atexit.register(_default_pool.shutdown)
+        return _default_pool
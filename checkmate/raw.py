@@ -0,0 +1,97 @@
+"""Compact results, which are used internally and converted to the pydantic models of `checkmate.types` on demand.
+
+Building a pydantic model validates all of its fields, which adds up when running many tests, so results are
+kept as plain dataclasses until a caller asks for the models (e.g., `run_tests` without `raw=True`).
+"""
+import json
+from dataclasses import asdict, dataclass, fields
+from typing import Optional
+
+from .types import (
+    FailResult,
+    Metrics,
+    ResultType,
+    RuntimeErrorResult,
+    SkippedResult,
+    SpecificationErrorResult,
+    SuccessResult,
+    SyntaxErrorResult,
+    TimeoutResult,
+)
+
+
+RESULT_MODELS = {
+    ResultType.SUCCESS: SuccessResult,
+    ResultType.SYNTAX_ERROR: SyntaxErrorResult,
+    ResultType.SPECIFICATION_ERROR: SpecificationErrorResult,
+    ResultType.RUNTIME_ERROR: RuntimeErrorResult,
+    ResultType.TIMEOUT: TimeoutResult,
+    ResultType.FAIL: FailResult,
+    ResultType.SKIPPED: SkippedResult,
+}
+
+
+@dataclass(slots=True)
+class RawMetrics:
+    """The fields of `checkmate.types.Metrics`."""
+
+    parse_seconds: float
+    spec_check_seconds: float
+    spawn_seconds: Optional[float] = None
+    wall_seconds: Optional[float] = None
+    cpu_seconds: Optional[float] = None
+    peak_rss: Optional[int] = None
+    sandbox_reuses: Optional[int] = None
+
+    def to_model(self) -> Metrics:
+        return Metrics.construct(**asdict(self))
+
+
+@dataclass(slots=True)
+class RawResult:
+    """The fields of all result models, where fields that do not apply to the `type` of the result are `None`."""
+
+    type: ResultType
+    error: Optional[str] = None
+    arg_names: Optional[list[str]] = None
+    input_args: Optional[list[str]] = None
+    expected_output_args: Optional[list[Optional[str]]] = None
+    expected_output: Optional[str] = None
+    function_name: Optional[str] = None
+    output_args: Optional[list[str]] = None
+    output: Optional[str] = None
+    metrics: Optional[RawMetrics] = None
+
+    def to_dict(self, exclude_metrics=False) -> dict:
+        """Return the fields of the model of this result, as they are serialized."""
+        values = {}
+        for name in RESULT_MODELS[self.type].__fields__:
+            if name == "type":
+                values[name] = self.type.value
+            elif name == "metrics":
+                if not exclude_metrics and self.metrics is not None:
+                    values[name] = asdict(self.metrics)
+            else:
+                values[name] = getattr(self, name)
+        return values
+
+    def to_json(self, exclude_metrics=False) -> str:
+        return json.dumps(self.to_dict(exclude_metrics))
+
+    @classmethod
+    def from_json(cls, data: str) -> "RawResult":
+        values = json.loads(data)
+        values["type"] = ResultType(values["type"])
+        metrics = values.pop("metrics", None)
+        result = cls(**{field.name: values.get(field.name) for field in fields(cls) if field.name != "metrics"})
+        if metrics is not None:
+            result.metrics = RawMetrics(**metrics)
+        return result
+
+    def to_model(self):
+        """Convert this result to the pydantic model of its type, without validating it again."""
+        model = RESULT_MODELS[self.type]
+        values = {name: getattr(self, name) for name in model.__fields__ if name not in ("type", "metrics")}
+        if self.metrics is not None:
+            values["metrics"] = self.metrics.to_model()
+        return model.construct(**values)
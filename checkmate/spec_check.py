@@ -1,4 +1,8 @@
 import ast
+import builtins
+
+from .cache import LRUCache, source_digest
+from .hooks import stage
 
 
 class SpecificationError(Exception):
@@ -19,13 +23,32 @@ class WrongNumberOfArgumentsError(SpecificationError):
     pass
 
 
+class FunctionSignature:
+    def __init__(self, name, lineno, arg_names):
+        self.name = name
+        self.lineno = lineno
+        self.arg_names = arg_names
+        self.import_lineno = None
+
+
+# Builtin exceptions that cannot catch a `BaseException` raised to interrupt the code.
+SAFE_EXCEPTION_NAMES = frozenset(
+    name for name, value in vars(builtins).items() if isinstance(value, type) and issubclass(value, Exception)
+)
+
+
 class SpecificationCheckVisitor(ast.NodeVisitor):
-    def __init__(self, input_args, function_name=None, is_level5=False):
-        self.input_args = input_args
-        self.function_name = function_name
-        self.arg_names = None
-        self.is_level_5 = is_level5
-        self.function_def_found = False
+    """Collects top-level function signatures and import statements, in the order they appear in the source.
+
+    Imports inside a top-level function are attributed to that function, since they only matter
+    if the function is the one being checked. It also records whether the code may catch exceptions
+    that are not subclasses of `Exception`, such as the ones used to interrupt it after a timeout.
+    """
+
+    def __init__(self):
+        self.events = []
+        self.may_catch_timeouts = False
+        self.current_function = None
         self.parents = []
         super().__init__()
 
@@ -38,39 +61,108 @@ class SpecificationCheckVisitor(ast.NodeVisitor):
         return isinstance(self.parents[-1], ast.Module)
 
     def visit_Import(self, node):
-        if self.is_level_5:
-            raise NoImportsAllowedError(node.lineno, "'import' statement not allowed")
+        if self.current_function is None:
+            self.events.append(node.lineno)
+        elif self.current_function.import_lineno is None:
+            self.current_function.import_lineno = node.lineno
+
+    def visit_ExceptHandler(self, node):
+        handler_types = node.type.elts if isinstance(node.type, ast.Tuple) else [node.type]
+        for handler_type in handler_types:
+            if not isinstance(handler_type, ast.Name) or handler_type.id not in SAFE_EXCEPTION_NAMES:
+                self.may_catch_timeouts = True
+        self.generic_visit(node)
+
+    def visit_Name(self, node):
+        # For example, `contextlib.suppress(BaseException)`.
+        if node.id == "BaseException":
+            self.may_catch_timeouts = True
 
     def visit_FunctionDef(self, node):
+        if node.name in ("__exit__", "__aexit__"):
+            # Context managers can suppress any exception.
+            self.may_catch_timeouts = True
         if not self.is_top_level():
             self.generic_visit(node)
             return
-        if self.function_name is None:
-            self.function_name = node.name
-        if node.name != self.function_name:
-            return
-        self.function_def_found = True
-        self.arg_names = [arg.arg for arg in node.args.args]
-        num_args = len(node.args.args)
-        expected_num_args = len(self.input_args)
-        if num_args != expected_num_args:
-            arg_str = "argument" if expected_num_args == 1 else "arguments"
-            raise WrongNumberOfArgumentsError(
-                node.lineno,
-                f"Function '{self.function_name}' accepts {expected_num_args} {arg_str}, but was given {num_args}",
-            )
+        signature = FunctionSignature(node.name, node.lineno, [arg.arg for arg in node.args.args])
+        self.events.append(signature)
+        self.current_function = signature
         self.generic_visit(node)
+        self.current_function = None
+
+
+class SourceAnalysis:
+    """The result of parsing and compiling a source once, shared by all tests that run on it."""
+
+    def __init__(self, source, digest=None):
+        self.source = source
+        self.digest = digest if digest is not None else source_digest(source)
+        self.code = None
+        self.syntax_error = None
+        self.events = []
+        self.may_catch_timeouts = False
+        try:
+            tree = ast.parse(source)
+            self.code = compile(tree, "<string>", "exec")
+        except Exception as e:
+            self.syntax_error = e
+            return
+        visitor = SpecificationCheckVisitor()
+        visitor.visit(tree)
+        self.events = visitor.events
+        self.may_catch_timeouts = visitor.may_catch_timeouts
+
+    def check_specification(self, input_args, function_name=None, is_level5=False):
+        if is_level5:
+            function_name = "when_run"
+        function_def_found = False
+        arg_names = None
+        for event in self.events:
+            if not isinstance(event, FunctionSignature):
+                if is_level5:
+                    raise NoImportsAllowedError(event, "'import' statement not allowed")
+                continue
+            if function_name is None:
+                function_name = event.name
+            if event.name != function_name:
+                continue
+            function_def_found = True
+            arg_names = event.arg_names
+            num_args = len(event.arg_names)
+            expected_num_args = len(input_args)
+            if num_args != expected_num_args:
+                arg_str = "argument" if expected_num_args == 1 else "arguments"
+                raise WrongNumberOfArgumentsError(
+                    event.lineno,
+                    f"Function '{function_name}' accepts {expected_num_args} {arg_str}, but was given {num_args}",
+                )
+            if is_level5 and event.import_lineno is not None:
+                raise NoImportsAllowedError(event.import_lineno, "'import' statement not allowed")
+        if not function_def_found:
+            if function_name is None:
+                raise FunctionDefNotFoundError(0, "No function found in source")
+            else:
+                raise FunctionDefNotFoundError(0, f"Function '{function_name}' not found")
+        return function_name, arg_names
+
+
+analysis_cache = LRUCache(maxsize=1024)
+
+
+def analyze_source(source) -> SourceAnalysis:
+    """Return the analysis of a source, reusing it for sources that only differ in comments or whitespace."""
+    key = source_digest(source)
+    analysis = analysis_cache.get(key)
+    if analysis is None:
+        with stage("compile"):
+            analysis = SourceAnalysis(source, key)
+        analysis_cache.put(key, analysis)
+    return analysis
 
 
 def check_specification(source, input_args, function_name=None, is_level5=False):
-    if is_level5:
-        function_name = "when_run"
-    tree = ast.parse(source)
-    visitor = SpecificationCheckVisitor(input_args, function_name, is_level5)
-    visitor.visit(tree)
-    if not visitor.function_def_found:
-        if function_name is None:
-            raise FunctionDefNotFoundError(0, "No function found in source")
-        else:
-            raise FunctionDefNotFoundError(0, f"Function '{function_name}' not found")
-    return visitor.function_name, visitor.arg_names
+    analysis = analyze_source(source)
+    if analysis.syntax_error is not None:
+        raise analysis.syntax_error
+    return analysis.check_specification(input_args, function_name, is_level5)
@@ -18,6 +18,20 @@ class Test(BaseModel):
         return values
 
 
+class ExecutionMode(str, Enum):
+    PROCESS = "process"
+    POOL = "pool"
+    INLINE = "inline"
+    FORK = "fork"
+
+
+class ReprLimits(BaseModel):
+    max_list: int = Field(10, ge=0)
+    max_string: int = Field(30, ge=0)
+    max_level: int = Field(6, ge=1)
+    max_length: Optional[int] = Field(None, ge=3)
+
+
 class Request(BaseModel):
     source: str
     tests: list[Test]
@@ -25,6 +39,21 @@ class Request(BaseModel):
     is_linked_list: Optional[bool] = False
     is_level5: Optional[bool] = False
     check_timeout: Optional[bool] = True
+    execution_mode: Optional[ExecutionMode] = ExecutionMode.PROCESS
+    max_workers: Optional[int] = Field(None, ge=1)
+    line_budget: Optional[int] = Field(None, ge=1)
+    stop_on_first_failure: Optional[bool] = False
+    stop_after_n_failures: Optional[int] = Field(None, ge=1)
+    skip_remaining_on_syntax_or_spec_error: Optional[bool] = False
+    collect_metrics: Optional[bool] = False
+    repr_limits: Optional[ReprLimits] = None
+
+    @root_validator(skip_on_failure=True)
+    def check_inline_not_parallel(cls, values):
+        max_workers = values.get("max_workers")
+        if values.get("execution_mode") == ExecutionMode.INLINE and max_workers is not None and max_workers > 1:
+            raise ValueError("The 'inline' execution mode cannot run tests in parallel")
+        return values
 
 
 class ResultType(str, Enum):
@@ -34,9 +63,43 @@ class ResultType(str, Enum):
     TIMEOUT = "timeout"
     FAIL = "fail"
     SUCCESS = "success"
+    SKIPPED = "skipped"
+
+
+class Metrics(BaseModel):
+    parse_seconds: float
+    spec_check_seconds: float
+    spawn_seconds: Optional[float] = None
+    wall_seconds: Optional[float] = None
+    cpu_seconds: Optional[float] = None
+    peak_rss: Optional[int] = None
+    sandbox_reuses: Optional[int] = None
 
 
-class BaseErrorResult(BaseModel):
+def exclude_field(exclude, name):
+    if exclude is None:
+        return {name}
+    if isinstance(exclude, dict):
+        return {**exclude, name: ...}
+    return set(exclude) | {name}
+
+
+class BaseResult(BaseModel):
+    metrics: Optional[Metrics] = None
+
+    # Results without metrics serialize as they did before metrics were added.
+    def dict(self, **kwargs):
+        if self.metrics is None:
+            kwargs["exclude"] = exclude_field(kwargs.get("exclude"), "metrics")
+        return super().dict(**kwargs)
+
+    def json(self, **kwargs):
+        if self.metrics is None:
+            kwargs["exclude"] = exclude_field(kwargs.get("exclude"), "metrics")
+        return super().json(**kwargs)
+
+
+class BaseErrorResult(BaseResult):
     arg_names: list[str]
     input_args: list[str]
     expected_output_args: Optional[list[Optional[str]]] = None
@@ -44,12 +107,12 @@ class BaseErrorResult(BaseModel):
     function_name: str
 
 
-class SyntaxErrorResult(BaseModel):
+class SyntaxErrorResult(BaseResult):
     type: Literal[ResultType.SYNTAX_ERROR] = ResultType.SYNTAX_ERROR
     error: str
 
 
-class SpecificationErrorResult(BaseModel):
+class SpecificationErrorResult(BaseResult):
     type: Literal[ResultType.SPECIFICATION_ERROR] = ResultType.SPECIFICATION_ERROR
     error: str
 
@@ -69,11 +132,23 @@ class FailResult(BaseErrorResult):
     output: str
 
 
-class SuccessResult(BaseModel):
+class SuccessResult(BaseResult):
     type: Literal[ResultType.SUCCESS] = ResultType.SUCCESS
 
 
+class SkippedResult(BaseResult):
+    type: Literal[ResultType.SKIPPED] = ResultType.SKIPPED
+
+
 Result = Annotated[
-    Union[SuccessResult, SyntaxErrorResult, SpecificationErrorResult, RuntimeErrorResult, TimeoutResult, FailResult],
+    Union[
+        SuccessResult,
+        SyntaxErrorResult,
+        SpecificationErrorResult,
+        RuntimeErrorResult,
+        TimeoutResult,
+        FailResult,
+        SkippedResult,
+    ],
     Field(discriminator="type"),
 ]
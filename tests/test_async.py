@@ -0,0 +1,105 @@
+import time
+import asyncio
+import multiprocessing
+
+import pytest
+
+from checkmate import Request, ResultType, run_tests_async
+from checkmate.index import TIMEOUT_SECONDS
+
+
+def get_async_response(source, tests, **kwargs):
+    request = Request(source=source.strip(), tests=tests, **kwargs)
+    return asyncio.run(run_tests_async(request))
+
+
+def test_async_results():
+    source = """
+def f(lst):
+    lst.append(42)
+    return len(lst) / (len(lst) - 1)
+"""
+    tests = [
+        {"input_args": ["[1]"], "output_args": ["[1, 42]"], "output": "2.0"},
+        {"input_args": ["[]"], "output": "1"},
+        {"input_args": ["[1, 2]"], "output": "2"},
+    ]
+    for options in [{}, {"check_timeout": False}, {"max_workers": 2}, {"execution_mode": "pool"}]:
+        result_list = get_async_response(source, tests, **options)
+        assert [result.type for result in result_list] == [
+            ResultType.SUCCESS,
+            ResultType.RUNTIME_ERROR,
+            ResultType.FAIL,
+        ]
+        assert result_list[1].error == "Line 3. ZeroDivisionError: division by zero"
+        assert result_list[2].output == "1.5"
+
+
+def test_async_timeouts_do_not_block_the_event_loop():
+    source = """
+def f(x):
+    while True:
+        pass
+"""
+    requests = [Request(source=source.strip(), tests=[{"input_args": ["1"], "output": "1"}]) for _ in range(4)]
+
+    async def run_all():
+        return await asyncio.gather(*(run_tests_async(request) for request in requests))
+
+    start = time.monotonic()
+    results = asyncio.run(run_all())
+    assert [result_list[0].type for result_list in results] == [ResultType.TIMEOUT] * 4
+    assert time.monotonic() - start < 2 * TIMEOUT_SECONDS
+
+
+def test_async_cancellation_kills_the_process():
+    source = """
+def f(x):
+    while True:
+        pass
+"""
+    request = Request(source=source.strip(), tests=[{"input_args": ["1"], "output": "1"}] * 2, max_workers=2)
+
+    async def run_and_cancel():
+        task = asyncio.create_task(run_tests_async(request))
+        await asyncio.sleep(0.5)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    start = time.monotonic()
+    asyncio.run(run_and_cancel())
+    assert time.monotonic() - start < TIMEOUT_SECONDS
+    # Pool workers from other tests are daemons, unlike the processes of the cancelled tests.
+    assert [process for process in multiprocessing.active_children() if not process.daemon] == []
+
+
+def test_async_lingering_thread_does_not_block_the_event_loop():
+    source = """
+import threading
+
+def f(x):
+    threading.Thread(target=lambda: sum(iter(int, 1))).start()
+    return x
+"""
+    request = Request(source=source.strip(), tests=[{"input_args": ["1"], "output": "1"}])
+    ticks = []
+
+    async def ticker():
+        while True:
+            ticks.append(time.monotonic())
+            await asyncio.sleep(0.1)
+
+    async def run_with_ticker():
+        ticker_task = asyncio.create_task(ticker())
+        try:
+            return await run_tests_async(request)
+        finally:
+            ticker_task.cancel()
+
+    start = time.monotonic()
+    result_list = asyncio.run(run_with_ticker())
+    assert result_list[0].type == ResultType.TIMEOUT
+    assert time.monotonic() - start < TIMEOUT_SECONDS + 2
+    assert len(ticks) > 10 * TIMEOUT_SECONDS // 2
+    assert [process for process in multiprocessing.active_children() if not process.daemon] == []
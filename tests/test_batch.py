@@ -0,0 +1,68 @@
+import pytest
+
+from checkmate import ResultType, run_batch
+from checkmate.monitoring import processes_started_total
+
+
+def test_batch_results_grouped_by_source():
+    sources = [
+        "def f(x):\n    return x + 1",
+        "def f(x):\n    return x + 2",
+        "def f(x):\n    return x +",
+    ]
+    tests = [{"input_args": ["1"], "output": "2"}, {"input_args": ["2"], "output": "4"}]
+    results = run_batch(sources, tests, check_timeout=False)
+    assert len(results) == 3
+    assert [result.type for result in results[0]] == [ResultType.SUCCESS, ResultType.FAIL]
+    assert [result.type for result in results[1]] == [ResultType.FAIL, ResultType.SUCCESS]
+    assert [result.type for result in results[2]] == [ResultType.SYNTAX_ERROR, ResultType.SYNTAX_ERROR]
+
+
+def test_batch_with_timeout():
+    sources = [
+        "def f(lst):\n    lst.append(42)",
+        "def f(lst):\n    lst.append(41)",
+    ]
+    tests = [{"input_args": ["[]"], "output_args": ["[42]"]}]
+    results = run_batch(sources, tests, check_timeout=True, max_workers=2)
+    assert results[0][0].type == ResultType.SUCCESS
+    assert results[1][0].type == ResultType.FAIL
+    assert results[1][0].output_args == ["[41]"]
+
+
+def test_batch_linked_list():
+    sources = ["def when_run(a):\n    a.go_next()\n    return a.get_value()"]
+    tests = [{"input_args": ["ListPtr([1, 2, 3], 0)"], "output": "2"}]
+    results = run_batch(sources, tests, is_linked_list=True, is_level5=True, check_timeout=False)
+    assert results[0][0].type == ResultType.SUCCESS
+
+
+def test_batch_invalid_test_argument():
+    sources = ["def f(x):\n    return x"]
+    tests = [{"input_args": ["[1,"], "output": "1"}]
+    results = run_batch(sources, tests, check_timeout=False)
+    assert results[0][0].type == ResultType.SPECIFICATION_ERROR
+
+
+def test_batch_invalid_tests():
+    tests = [{"input_args": ["[1]", "[2, 3]"], "output_args": ["[1, 2, 3]"]}]
+    with pytest.raises(ValueError, match="The length of input_args and output_args are not equal"):
+        run_batch(["def f(a, b):\n    pass"], tests)
+
+
+def test_batch_unknown_option():
+    with pytest.raises(TypeError, match="Unexpected keyword arguments: chek_timeout"):
+        run_batch(["def f(x):\n    return x"], [{"input_args": ["1"]}], chek_timeout=False)
+
+
+def test_batch_inline_runs_in_process(monkeypatch):
+    monkeypatch.setattr("os.cpu_count", lambda: 8)
+    before = processes_started_total.get("sandbox")
+    sources = ["def f(x):\n    return x + 1", "def f(x):\n    return x + 2"]
+    tests = [{"input_args": ["1"], "output": "2"}, {"input_args": ["2"], "output": "3"}]
+    results = run_batch(sources, tests, check_timeout=True, execution_mode="inline")
+    assert [[result.type for result in source_results] for source_results in results] == [
+        [ResultType.SUCCESS, ResultType.SUCCESS],
+        [ResultType.FAIL, ResultType.FAIL],
+    ]
+    assert processes_started_total.get("sandbox") == before
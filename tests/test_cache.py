@@ -0,0 +1,51 @@
+from . import get_response
+from checkmate import ResultType
+from checkmate.cache import LRUCache, normalize_source
+from checkmate.spec_check import analyze_source, analysis_cache
+
+
+def test_lru_cache_eviction():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.info() == (3, 1, 2, 2)
+
+
+def test_normalize_source_keeps_line_numbers():
+    source = "def f(x):  # add one\n    # comment\n    return x + 1   "
+    assert normalize_source(source) == "def f(x):\n\n    return x + 1"
+
+
+def test_normalize_source_keeps_strings():
+    source = 'def f(x):\n    return "# not a comment"  # comment'
+    assert normalize_source(source) == 'def f(x):\n    return "# not a comment"  # comment'
+    source = 'def f(x):\n    return """\n# not a comment  \n"""'
+    assert normalize_source(source) == source
+
+
+def test_analysis_cache_hit_for_equivalent_sources():
+    analysis_cache.clear()
+    first = analyze_source("def f(x):\n    return x + 1")
+    second = analyze_source("def f(x):  # comment\n    return x + 1  ")
+    assert first is second
+    assert analysis_cache.info().hits == 1
+    assert analysis_cache.info().misses == 1
+
+
+def test_cached_analysis_line_numbers():
+    source = """
+def f(x):
+    # comment
+    return x + foo()
+"""
+    tests = [{"input_args": ["1"], "output": "2"}]
+    result_list = get_response(source, tests)
+    assert result_list[0].type == ResultType.RUNTIME_ERROR
+    assert result_list[0].error == "Line 3. NameError: name 'foo' is not defined"
+    result_list = get_response(source.replace("# comment", ""), tests)
+    assert result_list[0].error == "Line 3. NameError: name 'foo' is not defined"
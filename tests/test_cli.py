@@ -0,0 +1,79 @@
+import io
+import json
+
+import pytest
+
+from checkmate.__main__ import main, read_checkpoint
+
+
+source = "def f(x):\n    return x * 2"
+
+
+def make_line(value):
+    tests = [{"input_args": [str(value)], "output": str(value * 2)}, {"input_args": [str(value)], "output": "0"}]
+    return json.dumps({"source": source, "tests": tests, "check_timeout": False})
+
+
+@pytest.fixture
+def input_path(tmp_path):
+    path = tmp_path / "requests.jsonl"
+    path.write_text("".join(make_line(value) + "\n" for value in range(1, 6)))
+    return path
+
+
+def read_results(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_results_in_input_order(input_path, tmp_path):
+    output_path = tmp_path / "results.jsonl"
+    main([str(input_path), "--output", str(output_path), "--workers", "2", "--max-in-flight", "3", "--quiet"])
+    results = read_results(output_path)
+    assert len(results) == 5
+    for result_list in results:
+        assert [result["type"] for result in result_list] == ["success", "fail"]
+    assert [result_list[1]["output"] for result_list in results] == ["2", "4", "6", "8", "10"]
+
+
+def test_stdin_and_stdout(monkeypatch, capsysbinary):
+    monkeypatch.setattr("sys.stdin", io.StringIO(make_line(1) + "\n\n" + "not json\n"))
+    main(["--workers", "1", "--quiet"])
+    lines = capsysbinary.readouterr().out.decode().splitlines()
+    assert len(lines) == 2
+    assert [result["type"] for result in json.loads(lines[0])] == ["success", "fail"]
+    assert "error" in json.loads(lines[1])
+
+
+def test_resume_from_checkpoint(input_path, tmp_path):
+    output_path = tmp_path / "results.jsonl"
+    checkpoint_path = tmp_path / "results.checkpoint"
+    args = [str(input_path), "--output", str(output_path), "--checkpoint", str(checkpoint_path), "--quiet"]
+    main(args)
+    expected = output_path.read_bytes()
+    assert read_checkpoint(str(checkpoint_path)) == {"input_lines": 5, "output_offset": len(expected)}
+
+    # A crash after two requests, in the middle of writing the third.
+    second_line_end = expected.index(b"\n", expected.index(b"\n") + 1) + 1
+    output_path.write_bytes(expected[: second_line_end + 10])
+    checkpoint_path.write_text(json.dumps({"input_lines": 2, "output_offset": second_line_end}))
+    main(args)
+    assert output_path.read_bytes() == expected
+
+
+def test_progress(input_path, tmp_path, capsys):
+    main([str(input_path), "--output", str(tmp_path / "results.jsonl"), "--progress-interval", "0"])
+    reports = capsys.readouterr().err.splitlines()
+    assert len(reports) == 6
+    assert reports[-1].startswith("checkmate: 5/5 requests, 10 tests in ")
+
+
+def test_progress_total_skips_blank_lines(tmp_path, capsys):
+    input_path = tmp_path / "requests.jsonl"
+    input_path.write_text(make_line(1) + "\n\n" + make_line(2) + "\n" + make_line(3) + "\n")
+    main([str(input_path), "--output", str(tmp_path / "results.jsonl")])
+    assert capsys.readouterr().err.splitlines()[-1].startswith("checkmate: 3/3 requests, 6 tests in ")
+
+
+def test_checkpoint_needs_output(input_path):
+    with pytest.raises(SystemExit):
+        main([str(input_path), "--checkpoint", "results.checkpoint"])
@@ -0,0 +1,95 @@
+import asyncio
+
+from . import get_response
+from checkmate import Request, ResultType, run_batch, run_tests_async
+
+
+source = """
+def f(x):
+    if x < 0:
+        while True:
+            pass
+    return 1 / x
+"""
+
+
+tests = [
+    {"input_args": ["1"], "output": "1.0"},
+    {"input_args": ["2"], "output": "1"},
+    {"input_args": ["0"], "output": "1"},
+    {"input_args": ["4"], "output": "0.25"},
+]
+
+
+def test_stop_on_first_failure():
+    result_list = get_response(source, tests, stop_on_first_failure=True)
+    assert [result.type for result in result_list] == [
+        ResultType.SUCCESS,
+        ResultType.FAIL,
+        ResultType.SKIPPED,
+        ResultType.SKIPPED,
+    ]
+
+
+def test_stop_after_n_failures():
+    result_list = get_response(source, tests, stop_after_n_failures=2)
+    assert [result.type for result in result_list] == [
+        ResultType.SUCCESS,
+        ResultType.FAIL,
+        ResultType.RUNTIME_ERROR,
+        ResultType.SKIPPED,
+    ]
+
+
+def test_stop_after_timeout():
+    timeout_tests = [{"input_args": ["-1"], "output": "1"}] * 3
+    result_list = get_response(source, timeout_tests, check_timeout=True, stop_on_first_failure=True)
+    assert [result.type for result in result_list] == [ResultType.TIMEOUT, ResultType.SKIPPED, ResultType.SKIPPED]
+
+
+def test_skip_remaining_on_syntax_error():
+    result_list = get_response("def f(x):\n    return x +", tests, skip_remaining_on_syntax_or_spec_error=True)
+    assert [result.type for result in result_list] == [ResultType.SYNTAX_ERROR] + [ResultType.SKIPPED] * 3
+
+
+def test_skip_remaining_on_spec_error():
+    spec_tests = [
+        {"input_args": ["2"], "output": "1"},
+        {"input_args": ["1", "2"], "output": "1"},
+        {"input_args": ["1"], "output": "1"},
+    ]
+    result_list = get_response(source, spec_tests, skip_remaining_on_syntax_or_spec_error=True)
+    assert [result.type for result in result_list] == [
+        ResultType.FAIL,
+        ResultType.SPECIFICATION_ERROR,
+        ResultType.SKIPPED,
+    ]
+
+
+def test_early_stop_per_source_in_batch():
+    sources = [source, source, "def f(x):\n    return 1 / x"]
+    results = run_batch(sources, tests, check_timeout=False, stop_on_first_failure=True)
+    assert [result.type for result in results[0]] == [
+        ResultType.SUCCESS,
+        ResultType.FAIL,
+        ResultType.SKIPPED,
+        ResultType.SKIPPED,
+    ]
+    assert results[1] == results[0]
+    assert [result.type for result in results[2]] == [
+        ResultType.SUCCESS,
+        ResultType.FAIL,
+        ResultType.SKIPPED,
+        ResultType.SKIPPED,
+    ]
+
+
+def test_early_stop_async():
+    request = Request(source=source.strip(), tests=tests, stop_on_first_failure=True)
+    result_list = asyncio.run(run_tests_async(request))
+    assert [result.type for result in result_list] == [
+        ResultType.SUCCESS,
+        ResultType.FAIL,
+        ResultType.SKIPPED,
+        ResultType.SKIPPED,
+    ]
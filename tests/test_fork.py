@@ -0,0 +1,133 @@
+import time
+
+import pytest
+
+from . import get_response
+from checkmate import ResultType, run_batch
+from checkmate.fork import ForkTemplates, can_fork
+from checkmate.index import TIMEOUT_SECONDS
+
+
+pytestmark = pytest.mark.skipif(not can_fork(), reason="requires os.fork")
+
+
+def test_fork_module_code_runs_once(tmp_path):
+    log_path = tmp_path / "calls.txt"
+    source = f"""
+with open({str(log_path)!r}, "a") as log:
+    log.write("module\\n")
+
+def f(x):
+    with open({str(log_path)!r}, "a") as log:
+        log.write("call\\n")
+    return x + 1
+"""
+    tests = [{"input_args": [str(i)], "output": str(i + 1)} for i in range(3)]
+    result_list = get_response(source, tests, check_timeout=True, execution_mode="fork")
+    assert [result.type for result in result_list] == [ResultType.SUCCESS] * 3
+    assert log_path.read_text() == "module\n" + "call\n" * 3
+
+
+def test_fork_tests_do_not_share_state():
+    source = """
+seen = []
+
+def f(lst):
+    seen.append(1)
+    lst.append(len(seen))
+"""
+    tests = [
+        {"input_args": ["[]"], "output_args": ["[1]"]},
+        {"input_args": ["[]"], "output_args": ["[1]"]},
+    ]
+    result_list = get_response(source, tests, check_timeout=True, execution_mode="fork")
+    assert [result.type for result in result_list] == [ResultType.SUCCESS, ResultType.SUCCESS]
+
+
+def test_fork_errors_and_timeouts():
+    source = """
+def f(x):
+    if x == 0:
+        while True:
+            pass
+    return 1 / (x - 1)
+"""
+    tests = [
+        {"input_args": ["2"], "output": "1.0"},
+        {"input_args": ["1"], "output": "1"},
+        {"input_args": ["0"], "output": "1"},
+        {"input_args": ["3"], "output": "0.5"},
+    ]
+    result_list = get_response(source, tests, check_timeout=True, execution_mode="fork")
+    assert [result.type for result in result_list] == [
+        ResultType.SUCCESS,
+        ResultType.RUNTIME_ERROR,
+        ResultType.TIMEOUT,
+        ResultType.SUCCESS,
+    ]
+    assert result_list[1].error == "Line 5. ZeroDivisionError: division by zero"
+
+
+def test_fork_module_timeout_is_shared():
+    source = """
+def f(x):
+    return x
+
+while True:
+    pass
+"""
+    tests = [{"input_args": ["1"], "output": "1"}, {"input_args": ["2"], "output": "2"}]
+    start = time.monotonic()
+    result_list = get_response(source, tests, check_timeout=True, execution_mode="fork")
+    assert [result.type for result in result_list] == [ResultType.TIMEOUT, ResultType.TIMEOUT]
+    assert time.monotonic() - start < 2 * TIMEOUT_SECONDS
+
+
+def test_fork_module_error():
+    source = """
+def f(x):
+    return x
+
+foo()
+"""
+    tests = [{"input_args": ["1"], "output": "1"}, {"input_args": ["2"], "output": "2"}]
+    result_list = get_response(source, tests, check_timeout=True, execution_mode="fork")
+    assert [result.type for result in result_list] == [ResultType.RUNTIME_ERROR, ResultType.RUNTIME_ERROR]
+    assert result_list[0].error == "Line 4. NameError: name 'foo' is not defined"
+
+
+def test_fork_parallel_and_line_budget():
+    source = """
+def f(n):
+    for i in range(n):
+        pass
+    return n
+"""
+    tests = [{"input_args": [str(n)], "output": str(n)} for n in (10, 10**9, 20, 30)]
+    result_list = get_response(
+        source, tests, check_timeout=True, execution_mode="fork", max_workers=2, line_budget=1000
+    )
+    assert [result.type for result in result_list] == [
+        ResultType.SUCCESS,
+        ResultType.TIMEOUT,
+        ResultType.SUCCESS,
+        ResultType.SUCCESS,
+    ]
+
+
+def test_fork_batch():
+    sources = ["def f(x):\n    return x + 1", "def f(x):\n    return x - 1"]
+    tests = [{"input_args": ["1"], "output": "2"}, {"input_args": ["2"], "output": "3"}]
+    results = run_batch(sources, tests, execution_mode="fork", max_workers=2)
+    assert [[result.type for result in source_results] for source_results in results] == [
+        [ResultType.SUCCESS, ResultType.SUCCESS],
+        [ResultType.FAIL, ResultType.FAIL],
+    ]
+
+
+def test_fork_templates_close_after_last_job():
+    templates = ForkTemplates("def f(x):\n    return x", timeout=TIMEOUT_SECONDS, num_jobs=1)
+    assert templates.run("f", [1]).output == 1
+    templates.finish_job()
+    with pytest.raises(RuntimeError):
+        templates.run("f", [1])
@@ -0,0 +1,82 @@
+import pytest
+
+from . import get_response
+from checkmate import ResultType
+from checkmate.hooks import Hook, add_hook, no_stage, remove_hook, stage
+from checkmate.spec_check import analysis_cache
+
+
+class RecordingHook(Hook):
+    def __init__(self):
+        self.events = []
+
+    def start(self, stage, details):
+        self.events.append(("start", stage))
+
+    def end(self, stage, details, error):
+        self.events.append(("end", stage, type(error).__name__ if error is not None else None))
+
+
+@pytest.fixture
+def hook():
+    hook = RecordingHook()
+    add_hook(hook)
+    yield hook
+    remove_hook(hook)
+
+
+def stages(hook):
+    return [event[1] for event in hook.events if event[0] == "start"]
+
+
+def test_no_hooks():
+    assert stage("execute") is no_stage
+
+
+def test_stages_with_timeout(hook):
+    analysis_cache.clear()
+    source = """
+def f(x):
+    return x + 1
+"""
+    result_list = get_response(source, [{"input_args": ["1"], "output": "3"}], check_timeout=True)
+    assert result_list[0].type == ResultType.FAIL
+    assert stages(hook) == [
+        "compile",
+        "parse_args",
+        "run_test",
+        "spec_check",
+        "launch",
+        "execute",
+        "compare",
+        "stringify",
+    ]
+    assert hook.events[-1] == ("end", "run_test", None)
+
+
+def test_stages_without_timeout(hook):
+    source = """
+def f(x):
+    return x + 1
+"""
+    result_list = get_response(source, [{"input_args": ["1"], "output": "2"}])
+    assert result_list[0].type == ResultType.SUCCESS
+    assert stages(hook)[-3:] == ["spec_check", "execute", "compare"]
+
+
+def test_stage_error(hook):
+    source = """
+def f(x):
+    return x + 1
+"""
+    result_list = get_response(source, [{"input_args": ["1", "2"], "output": "2"}])
+    assert result_list[0].type == ResultType.SPECIFICATION_ERROR
+    assert ("end", "spec_check", "WrongNumberOfArgumentsError") in hook.events
+
+
+def test_remove_hook():
+    hook = RecordingHook()
+    add_hook(hook)
+    remove_hook(hook)
+    get_response("def f(x):\n    return x", [{"input_args": ["1"], "output": "1"}])
+    assert hook.events == []
@@ -0,0 +1,55 @@
+import time
+import asyncio
+
+from checkmate import Request, ResultType, iter_results, iter_results_async
+
+
+source = """
+import time
+
+def f(x):
+    time.sleep(x)
+    return x
+"""
+
+
+def get_request(delays, **kwargs):
+    tests = [{"input_args": [str(delay)], "output": str(delay)} for delay in delays]
+    return Request(source=source.strip(), tests=tests, **kwargs)
+
+
+async def collect(request):
+    return [item async for item in iter_results_async(request)]
+
+
+def test_iter_results_in_order():
+    request = get_request([0, 0.1, 0])
+    items = list(iter_results(request))
+    assert [index for index, _ in items] == [0, 1, 2]
+    assert all(result.type == ResultType.SUCCESS for _, result in items)
+
+
+def test_iter_results_in_order_of_completion():
+    request = get_request([1, 0], max_workers=2)
+    items = list(iter_results(request))
+    assert [index for index, _ in items] == [1, 0]
+    assert all(result.type == ResultType.SUCCESS for _, result in items)
+
+
+def test_iter_results_stop_early():
+    request = get_request([0] + [1] * 4, max_workers=1)
+    start = time.monotonic()
+    results = iter_results(request)
+    assert next(results)[0] == 0
+    results.close()
+    assert time.monotonic() - start < 1
+
+
+def test_iter_results_async():
+    items = asyncio.run(collect(get_request([0, 0.1, 0])))
+    assert [index for index, _ in items] == [0, 1, 2]
+    items = asyncio.run(collect(get_request([1, 0], max_workers=2)))
+    assert [index for index, _ in items] == [1, 0]
+    items = asyncio.run(collect(get_request([1, 0], max_workers=2, execution_mode="fork")))
+    assert [index for index, _ in items] == [1, 0]
+    assert all(result.type == ResultType.SUCCESS for _, result in items)
@@ -1,5 +1,9 @@
+import copy
+import pickle
+
 from . import get_response
 from checkmate import ResultType
+from checkmate.linked_list import ListPtr
 
 
 def test_linked_list_operations_not_available():
@@ -273,3 +277,48 @@ def when_run(a):
     result_list = get_response(source, tests, is_linked_list=True, is_level5=True)
     assert len(result_list) == 1
     assert result_list[0].type == ResultType.FAIL
+
+
+def test_import_error_line():
+    source = """
+def when_run(a):
+    return a.get_value()
+
+import os
+"""
+    tests = [{"input_args": ["ListPtr([1, 2, 3], 0)"], "output": "1"}] * 2
+    result_list = get_response(source, tests, is_linked_list=True, is_level5=True)
+    assert len(result_list) == 2
+    assert result_list[0].error == "Line 4. 'import' statement not allowed"
+    assert result_list[1].error == "Line 4. 'import' statement not allowed"
+
+
+def test_linked_list_error_line():
+    source = """
+def when_run(a):
+    while True:
+        a.go_next()
+"""
+    tests = [{"input_args": ["ListPtr([1, 2, 3], 0)"], "output": "None"}]
+    result_list = get_response(source, tests, is_linked_list=True, is_level5=True)
+    assert len(result_list) == 1
+    assert result_list[0].type == ResultType.RUNTIME_ERROR
+    assert "Line 3: Cannot 'go_next' at the end of linked list" in result_list[0].error
+
+
+def test_list_ptr_copies():
+    ptr = ListPtr([1, 2, 3], 1)
+    for copied in [ptr.copy(), copy.copy(ptr), copy.deepcopy(ptr), pickle.loads(pickle.dumps(ptr))]:
+        assert copied == ptr and copied is not ptr
+        copied.set_value(0)
+        assert ptr.get_value() == 2
+    assert not hasattr(ptr, "__dict__")
+
+
+def test_list_ptr_equality():
+    assert ListPtr([1, 2, 3], 1) == ListPtr([1, 2, 3], 1)
+    assert ListPtr([1, 2, 3], 1) != ListPtr([1, 2, 3], 2)
+    assert ListPtr([1, 2, 3], 1) == ListPtr([1, 2, 3], None)
+    assert ListPtr([1, 2, 3], None) != ListPtr([1, 2], None)
+    assert ListPtr([1, 2, 3], 0) != [1, 2, 3]
+    assert repr(ListPtr([1, 2, 3], None)) == "ListPtr([1, 2, 3], None)"
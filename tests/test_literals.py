@@ -0,0 +1,58 @@
+import pytest
+
+from . import get_response
+from checkmate import ResultType
+from checkmate.linked_list import ListPtr
+from checkmate.literals import get_template, parse_literal
+
+
+def test_parse_plain_literals():
+    assert parse_literal("[1, (2, 3), {'a': None}]", False) == [1, (2, 3), {"a": None}]
+    assert parse_literal("-5", False) == -5
+
+
+def test_parse_non_literal_expressions():
+    assert parse_literal("[0] * 3", False) == [0, 0, 0]
+    assert parse_literal("float('inf')", False) == float("inf")
+
+
+def test_parse_list_ptr():
+    assert parse_literal("ListPtr([1, 2, 3], 1)", True) == ListPtr([1, 2, 3], 1)
+    with pytest.raises(NameError):
+        parse_literal("ListPtr([1, 2, 3], 1)", False)
+
+
+def test_parse_returns_fresh_copies():
+    first = parse_literal("[[1], [2]]", False)
+    first[0].append(42)
+    assert parse_literal("[[1], [2]]", False) == [[1], [2]]
+    first = parse_literal("ListPtr([1, 2, 3], 0)", True)
+    first.set_value(0)
+    assert parse_literal("ListPtr([1, 2, 3], 0)", True) == ListPtr([1, 2, 3], 0)
+
+
+def test_mutated_args_not_shared_between_tests():
+    source = """
+def f(lst):
+    lst.append(42)
+"""
+    tests = [{"input_args": ["[]"], "output_args": ["[42]"]}] * 3
+    result_list = get_response(source, tests)
+    assert [result.type for result in result_list] == [ResultType.SUCCESS] * 3
+
+
+def test_template_copies_are_independent():
+    template = get_template("{'a': [1, {2, 3}], 'b': (4, [5])}", False)
+    first = template.copy()
+    first["a"][1].add(42)
+    first["b"][1].append(42)
+    assert template.copy() == {"a": [1, {2, 3}], "b": (4, [5])}
+    assert template.value == {"a": [1, {2, 3}], "b": (4, [5])}
+
+
+def test_template_copies_keep_shared_references_of_expressions():
+    template = get_template("[[0] * 2] * 2", False)
+    grid = template.copy()
+    grid[0][0] = 1
+    assert grid == [[1, 0], [1, 0]]
+    assert template.value == [[0, 0], [0, 0]]
@@ -411,3 +411,24 @@ def concat(a, b):
     ]
     with pytest.raises(ValidationError):
         Request(source=source.strip(), tests=tests)
+
+
+def test_wrong_number_of_args_per_test():
+    source = """
+def bar(a, b):
+    return 10 * a + b
+
+def foo(a, b, c):
+    return 10 * a + b
+"""
+    tests = [
+        {"input_args": ["1", "2"], "output": "12"},
+        {"input_args": ["1", "2", "3"], "output": "12"},
+        {"input_args": ["1", "2"], "output": "12", "function_name": "bar"},
+    ]
+    result_list = get_response(source, tests, function_name="foo")
+    assert len(result_list) == 3
+    assert result_list[0].type == ResultType.SPECIFICATION_ERROR
+    assert result_list[0].error == "Line 4. Function 'foo' accepts 2 arguments, but was given 3"
+    assert result_list[1].type == ResultType.SUCCESS
+    assert result_list[2].type == ResultType.SUCCESS
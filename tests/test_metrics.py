@@ -0,0 +1,69 @@
+import pytest
+
+from . import get_response
+from checkmate import ResultType
+from checkmate.fork import can_fork
+from checkmate.pool import WorkerPool
+
+
+source = """
+def f(x):
+    return sum(range(x))
+"""
+
+
+tests = [{"input_args": ["10"], "output": "45"}, {"input_args": ["100"], "output": "0"}]
+
+
+def test_no_metrics_by_default():
+    result_list = get_response(source, tests, check_timeout=True)
+    assert all(result.metrics is None for result in result_list)
+    assert "metrics" not in result_list[0].json()
+    assert "metrics" not in result_list[1].dict(exclude={"output"})
+    assert "output" not in result_list[1].dict(exclude={"output"})
+
+
+def test_metrics_serialized():
+    result_list = get_response(source, tests, collect_metrics=True)
+    assert result_list[0].dict()["metrics"]["parse_seconds"] > 0
+    assert '"metrics": {' in result_list[1].json()
+
+
+@pytest.mark.parametrize("check_timeout,execution_mode", [(False, "process"), (True, "process"), (True, "inline")])
+def test_metrics(check_timeout, execution_mode):
+    result_list = get_response(
+        source, tests, check_timeout=check_timeout, execution_mode=execution_mode, collect_metrics=True
+    )
+    assert [result.type for result in result_list] == [ResultType.SUCCESS, ResultType.FAIL]
+    for result in result_list:
+        metrics = result.metrics
+        assert metrics.parse_seconds > 0
+        assert metrics.spec_check_seconds > 0
+        assert metrics.spawn_seconds >= 0
+        assert metrics.wall_seconds > 0
+        assert metrics.cpu_seconds >= 0
+        assert metrics.peak_rss > 0
+    expected_reuses = 0 if execution_mode == "process" and check_timeout else None
+    assert [result.metrics.sandbox_reuses for result in result_list] == [expected_reuses] * 2
+
+
+def test_metrics_of_early_results():
+    result_list = get_response("def f(x):\n    return x +", tests, collect_metrics=True)
+    assert result_list[0].type == ResultType.SYNTAX_ERROR
+    assert result_list[0].metrics.parse_seconds > 0
+    assert result_list[0].metrics.wall_seconds is None
+
+
+def test_pool_sandbox_reuses():
+    pool = WorkerPool(size=1)
+    try:
+        outcomes = [pool.run(source, "f", [10], 4, measure=True) for _ in range(3)]
+    finally:
+        pool.shutdown()
+    assert [outcome.usage.reuses for outcome in outcomes] == [0, 1, 2]
+
+
+@pytest.mark.skipif(not can_fork(), reason="requires os.fork")
+def test_fork_sandbox_reuses():
+    result_list = get_response(source, tests * 2, check_timeout=True, execution_mode="fork", collect_metrics=True)
+    assert [result.metrics.sandbox_reuses for result in result_list] == [0, 1, 2, 3]
@@ -0,0 +1,88 @@
+import urllib.request
+
+from . import get_response
+from checkmate import ResultType
+from checkmate.cache import LRUCache
+from checkmate.index import run_tests
+from checkmate.monitoring import Counter, Gauge, Histogram, Registry, registry, serve
+from checkmate.types import Request
+
+
+def test_registry_render_and_snapshot():
+    test_registry = Registry()
+    counter = test_registry.register(Counter("tests_total", "Tests.", ["type"]))
+    gauge = test_registry.register(Gauge("workers", "Workers.", function=lambda: {(): 3}))
+    histogram = test_registry.register(Histogram("duration_seconds", "Duration.", buckets=[0.1, 1]))
+    counter.inc("success")
+    counter.inc("fail", amount=2)
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    histogram.observe(5)
+    assert test_registry.render() == (
+        "# HELP tests_total Tests.\n"
+        "# TYPE tests_total counter\n"
+        'tests_total{type="success"} 1\n'
+        'tests_total{type="fail"} 2\n'
+        "# HELP workers Workers.\n"
+        "# TYPE workers gauge\n"
+        "workers 3\n"
+        "# HELP duration_seconds Duration.\n"
+        "# TYPE duration_seconds histogram\n"
+        'duration_seconds_bucket{le="0.1"} 1\n'
+        'duration_seconds_bucket{le="1"} 2\n'
+        'duration_seconds_bucket{le="+Inf"} 3\n'
+        "duration_seconds_sum 5.55\n"
+        "duration_seconds_count 3\n"
+    )
+    assert test_registry.snapshot() == {
+        "tests_total": [{"labels": {"type": "success"}, "value": 1}, {"labels": {"type": "fail"}, "value": 2}],
+        "workers": [{"labels": {}, "value": 3}],
+        "duration_seconds": {"buckets": {"0.1": 1, "1": 2, "+Inf": 3}, "sum": 5.55, "count": 3},
+    }
+    assert gauge.get() == 3
+
+
+def test_metrics_are_updated():
+    tests_total = registry.metrics["checkmate_tests_total"]
+    processes = registry.metrics["checkmate_processes_started_total"]
+    durations = registry.metrics["checkmate_test_duration_seconds"]
+    successes, fails, sandboxes = tests_total.get("success"), tests_total.get("fail"), processes.get("sandbox")
+    count = durations.snapshot()["count"]
+    source = """
+def f(x):
+    return x + 1
+"""
+    tests = [{"input_args": ["1"], "output": "2"}, {"input_args": ["1"], "output": "3"}]
+    result_list = get_response(source, tests, check_timeout=True)
+    assert [result.type for result in result_list] == [ResultType.SUCCESS, ResultType.FAIL]
+    assert tests_total.get("success") == successes + 1
+    assert tests_total.get("fail") == fails + 1
+    assert processes.get("sandbox") == sandboxes + 2
+    assert durations.snapshot()["count"] == count + 2
+
+
+def test_result_cache_metrics():
+    requests_total = registry.metrics["checkmate_result_cache_requests_total"]
+    hits, misses = requests_total.get("hit"), requests_total.get("miss")
+    request = Request(
+        source="def f(x):\n    return x", tests=[{"input_args": ["1"], "output": "1"}], check_timeout=False
+    )
+    cache = LRUCache()
+    run_tests(request, result_cache=cache)
+    run_tests(request, result_cache=cache)
+    assert requests_total.get("miss") == misses + 1
+    assert requests_total.get("hit") == hits + 1
+
+
+def test_serve():
+    server = serve(port=0)
+    try:
+        port = server.server_address[1]
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+            body = response.read().decode()
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert "# TYPE checkmate_tests_total counter" in body
+    assert 'checkmate_pool_workers{state="busy"}' in body
+    assert 'checkmate_cache_hits_total{cache="analysis"}' in body
@@ -0,0 +1,136 @@
+import sys
+
+from . import get_response
+from checkmate import ResultType
+from checkmate.linked_list import ListPtr
+from checkmate.pool import WorkerPool
+
+
+def test_pool_success():
+    source = """
+def f(x):
+    return x + 1
+"""
+    tests = [{"input_args": ["1"], "output": "2"}, {"input_args": ["2"], "output": "4"}]
+    result_list = get_response(source, tests, check_timeout=True, execution_mode="pool")
+    assert len(result_list) == 2
+    assert result_list[0].type == ResultType.SUCCESS
+    assert result_list[1].type == ResultType.FAIL
+
+
+def test_pool_output_args():
+    source = """
+def f(lst):
+    lst.append(42)
+"""
+    tests = [{"input_args": ["[]"], "output_args": ["[42]"]}, {"input_args": ["[]"], "output_args": ["[]"]}]
+    result_list = get_response(source, tests, check_timeout=True, execution_mode="pool")
+    assert result_list[0].type == ResultType.SUCCESS
+    assert result_list[1].type == ResultType.FAIL
+    assert result_list[1].output_args == ["[42]"]
+
+
+def test_pool_runtime_error():
+    source = """
+def f(x):
+    return x + foo()
+"""
+    tests = [{"input_args": ["1"], "output": "2"}]
+    result_list = get_response(source, tests, check_timeout=True, execution_mode="pool")
+    assert result_list[0].type == ResultType.RUNTIME_ERROR
+    assert result_list[0].error == "Line 2. NameError: name 'foo' is not defined"
+
+
+def test_pool_linked_list():
+    source = """
+def when_run(a):
+    while a.has_next():
+        a.set_value(0)
+        a.go_next()
+    a.set_value(0)
+"""
+    tests = [{"input_args": ["ListPtr([1, 2, 3], 0)"], "output_args": ["ListPtr([0, 0, 0], None)"]}]
+    result_list = get_response(
+        source, tests, check_timeout=True, execution_mode="pool", is_linked_list=True, is_level5=True
+    )
+    assert result_list[0].type == ResultType.SUCCESS
+
+
+def test_pool_reuses_workers():
+    pool = WorkerPool(size=1)
+    try:
+        pid_source = "import os\ndef f():\n    return os.getpid()"
+        first = pool.run(pid_source, "f", [], 4)
+        second = pool.run(pid_source, "f", [], 4)
+        assert first.output == second.output
+    finally:
+        pool.shutdown()
+
+
+def test_pool_recycles_workers_after_max_jobs():
+    pool = WorkerPool(size=1, max_jobs=2)
+    try:
+        pid_source = "import os\ndef f():\n    return os.getpid()"
+        pids = [pool.run(pid_source, "f", [], 4).output for _ in range(3)]
+        assert pids[0] == pids[1]
+        assert pids[1] != pids[2]
+    finally:
+        pool.shutdown()
+
+
+def test_pool_replaces_timed_out_worker():
+    pool = WorkerPool(size=1)
+    try:
+        outcome = pool.run("def f():\n    while True:\n        pass", "f", [], 0.5)
+        assert outcome.timeout
+        outcome = pool.run("def f(x):\n    return x + 1", "f", [1], 4)
+        assert outcome.output == 2
+    finally:
+        pool.shutdown()
+
+
+def test_pool_isolates_builtins():
+    pool = WorkerPool(size=1)
+    try:
+        patch_source = "def f():\n    __builtins__['len'] = lambda x: 42\n    return len([])"
+        assert pool.run(patch_source, "f", [], 4).output == 42
+        assert pool.run("def f():\n    return len([])", "f", [], 4).output == 0
+    finally:
+        pool.shutdown()
+
+
+def test_pool_recycles_workers_that_change_modules():
+    pool = WorkerPool(size=1)
+    try:
+        pid_source = "import os\ndef f():\n    return os.getpid()"
+        patch_source = "import builtins\ndef f():\n    builtins.len = lambda x: 42\n    return builtins.len([])"
+        list_ptr_source = "def f(a):\n    type(a).get_value = lambda self: 42\n    return a.get_value()"
+        first = pool.run(pid_source, "f", [], 4).output
+        assert pool.run(patch_source, "f", [], 4).output == 42
+        second = pool.run(pid_source, "f", [], 4).output
+        assert first != second
+        assert pool.run("def f():\n    return len([])", "f", [], 4).output == 0
+        assert pool.run(list_ptr_source, "f", [ListPtr([1])], 4).output == 42
+        assert pool.run("def f(a):\n    return a.get_value()", "f", [ListPtr([1])], 4).output == 1
+        assert pool.run(pid_source, "f", [], 4).output != second
+    finally:
+        pool.shutdown()
+
+
+def test_pool_recycles_workers_that_change_the_interpreter():
+    pool = WorkerPool(size=1)
+    try:
+        pid_source = "import os\ndef f():\n    return os.getpid()"
+        limit_source = "import sys\ndef f():\n    sys.setrecursionlimit(123456)"
+        thread_source = (
+            "import threading\ndef f():\n    threading.Thread(target=sum, args=[iter(int, 1)], daemon=True).start()"
+        )
+        state_source = "import sys, threading\ndef f():\n    return sys.getrecursionlimit(), threading.active_count()"
+        default_limit = sys.getrecursionlimit()
+        for source in [limit_source, thread_source]:
+            first = pool.run(pid_source, "f", [], 4).output
+            pool.run(source, "f", [], 4)
+            assert pool.run(pid_source, "f", [], 4).output != first
+            assert pool.run(state_source, "f", [], 4).output == (default_limit, 1)
+    finally:
+        pool.shutdown()
@@ -0,0 +1,85 @@
+import asyncio
+
+from checkmate import (
+    FailResult,
+    RawResult,
+    Request,
+    ResultType,
+    iter_results,
+    run_batch,
+    run_tests,
+    run_tests_async,
+)
+from checkmate.cache import LRUCache
+from checkmate.raw import RawMetrics
+
+
+source = """
+def f(x):
+    return 1 / x
+"""
+
+
+tests = [
+    {"input_args": ["1"], "output": "1.0"},
+    {"input_args": ["2"], "output": "1"},
+    {"input_args": ["0"], "output": "1"},
+    {"input_args": ["1", "2"], "output": "1"},
+]
+
+
+def make_request(**options):
+    return Request(source=source.strip(), tests=tests, check_timeout=False, **options)
+
+
+def test_raw_results():
+    results = run_tests(make_request(), raw=True)
+    assert all(isinstance(result, RawResult) for result in results)
+    assert [result.type for result in results] == [
+        ResultType.SUCCESS,
+        ResultType.FAIL,
+        ResultType.RUNTIME_ERROR,
+        ResultType.SPECIFICATION_ERROR,
+    ]
+    assert results[1].output == "0.5"
+    assert results[1].input_args == ["2"]
+
+
+def test_raw_results_convert_to_models():
+    raw_results = run_tests(make_request(), raw=True)
+    results = run_tests(make_request())
+    assert isinstance(results[1], FailResult)
+    assert [result.to_model() for result in raw_results] == results
+    assert [result.to_model().json() for result in raw_results] == [result.json() for result in results]
+    assert [result.to_json() for result in raw_results] == [result.json() for result in results]
+    assert [result.to_dict() for result in raw_results] == [result.dict() for result in results]
+
+
+def test_raw_metrics():
+    results = run_tests(make_request(collect_metrics=True), raw=True)
+    assert isinstance(results[0].metrics, RawMetrics)
+    assert results[0].to_model().metrics.parse_seconds == results[0].metrics.parse_seconds
+
+
+def test_json_round_trip():
+    for result in run_tests(make_request(collect_metrics=True), raw=True):
+        assert RawResult.from_json(result.to_json()) == result
+        assert RawResult.from_json(result.to_json(exclude_metrics=True)).metrics is None
+
+
+def test_raw_cached_results():
+    result_cache = LRUCache()
+    first = run_tests(make_request(), result_cache, raw=True)
+    assert run_tests(make_request(), result_cache, raw=True) == first
+    assert [result.to_model() for result in first] == run_tests(make_request(), result_cache)
+
+
+def test_raw_iter_results_and_batch():
+    assert all(isinstance(result, RawResult) for _, result in iter_results(make_request(), raw=True))
+    results = run_batch([source, source], tests, check_timeout=False, raw=True)
+    assert results[0] == results[1] == run_tests(make_request(), raw=True)
+
+
+def test_raw_async():
+    results = asyncio.run(run_tests_async(make_request(), raw=True))
+    assert results == run_tests(make_request(), raw=True)
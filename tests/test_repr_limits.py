@@ -0,0 +1,60 @@
+from . import get_response
+from checkmate import ReprLimits, ResultType
+from checkmate.index import stringify
+from checkmate.linked_list import ListPtr
+
+
+source = """
+def f(n):
+    return [str(i) * 50 for i in range(n)]
+"""
+
+
+def test_default_limits():
+    result_list = get_response(source, [{"input_args": ["20"], "output": "[]"}])
+    assert result_list[0].type == ResultType.FAIL
+    assert result_list[0].output.startswith("['000000000000...0000000000000',")
+    assert result_list[0].output.endswith(", ...]")
+    assert result_list[0].output.count("'") == 20
+
+
+def test_custom_limits():
+    repr_limits = {"max_list": 2, "max_string": 10, "max_length": 20}
+    result_list = get_response(source, [{"input_args": ["20"], "output": "list(range(30))"}], repr_limits=repr_limits)
+    assert result_list[0].output == "['00...000', '11...."
+    assert result_list[0].expected_output == "[0, 1, ...]"
+    assert result_list[0].input_args == ["20"]
+
+
+def test_limits_apply_to_error_results():
+    timeout_source = """
+def f(x):
+    while True:
+        pass
+"""
+    tests = [{"input_args": ["list(range(100))"], "output": "1"}]
+    repr_limits = {"max_list": 1}
+    result_list = get_response(timeout_source, tests, check_timeout=True, line_budget=1000, repr_limits=repr_limits)
+    assert result_list[0].type == ResultType.TIMEOUT
+    assert result_list[0].input_args == ["[0, ...]"]
+
+
+def test_max_length_bounds_large_values():
+    value = [[list(range(100))] * 100] * 100
+    string = stringify(value, ReprLimits(max_list=100, max_length=50))
+    assert len(string) == 50
+    assert string == stringify(value, ReprLimits(max_list=100, max_length=None))[:47] + "..."
+
+
+def test_no_max_length():
+    assert stringify("x" * 100, ReprLimits(max_string=1000, max_length=None)) == repr("x" * 100)
+
+
+def test_list_ptr():
+    assert stringify(ListPtr([1, 2, 3], None)) == "ListPtr([1, 2, 3], None)"
+    assert stringify(ListPtr(range(20), 0), ReprLimits(max_list=2)) == "ListPtr([0, 1, ...], 0)"
+
+
+def test_no_max_length_by_default():
+    value = [["y" * 25] * 10] * 10
+    assert stringify(value) == repr(value)
@@ -0,0 +1,61 @@
+from checkmate import Request, ResultType, run_tests, run_batch
+from checkmate.cache import LRUCache, SqliteCache
+
+
+SOURCE = """
+def f(x):
+    return x + foo(x)
+
+def foo(x):
+    return 1
+"""
+
+TESTS = [{"input_args": ["1"], "output": "2"}, {"input_args": ["2"], "output": "4"}]
+
+
+def test_memory_result_cache():
+    cache = LRUCache()
+    request = Request(source=SOURCE, tests=TESTS, check_timeout=False)
+    first = run_tests(request, result_cache=cache)
+    assert cache.info().misses == 2
+    second = run_tests(request, result_cache=cache)
+    assert cache.info().hits == 2
+    assert second == first
+    assert second[1].type == ResultType.FAIL
+    assert second[1].output == "3"
+
+
+def test_result_cache_equivalent_source():
+    cache = LRUCache()
+    run_tests(Request(source=SOURCE, tests=TESTS, check_timeout=False), result_cache=cache)
+    commented_source = SOURCE.replace("return 1", "return 1  # always one")
+    run_tests(Request(source=commented_source, tests=TESTS, check_timeout=False), result_cache=cache)
+    assert cache.info().hits == 2
+
+
+def test_result_cache_depends_on_request_flags():
+    cache = LRUCache()
+    run_tests(Request(source=SOURCE, tests=TESTS, check_timeout=False), result_cache=cache)
+    run_tests(Request(source=SOURCE, tests=TESTS, check_timeout=False, function_name="foo"), result_cache=cache)
+    assert cache.info().hits == 0
+
+
+def test_result_cache_skips_timeouts():
+    cache = LRUCache()
+    source = "def f(x):\n    raise KeyboardInterrupt"
+    run_tests(Request(source=source, tests=TESTS[:1], check_timeout=False), result_cache=cache)
+    assert len(cache) == 0
+
+
+def test_sqlite_result_cache(tmp_path):
+    path = tmp_path / "results.db"
+    cache = SqliteCache(path)
+    sources = [SOURCE, "def f(x):\n    return 2 * x"]
+    first = run_batch(sources, TESTS, check_timeout=False, result_cache=cache)
+    cache.close()
+    cache = SqliteCache(path)
+    second = run_batch(sources, TESTS, check_timeout=False, result_cache=cache)
+    assert cache.info().hits == 4
+    assert second == first
+    assert [result.type for result in second[1]] == [ResultType.SUCCESS, ResultType.SUCCESS]
+    cache.close()
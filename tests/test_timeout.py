@@ -1,5 +1,10 @@
+import time
+
+import pytest
+
 from . import get_response
 from checkmate import ResultType
+from checkmate.index import TIMEOUT_SECONDS
 
 
 def test_inner_timeout():
@@ -45,6 +50,21 @@ def f(x):
     assert result_list[0].type == ResultType.RUNTIME_ERROR
 
 
+def test_lingering_thread_timeout():
+    source = """
+import threading
+
+def f(x):
+    threading.Thread(target=lambda: sum(iter(int, 1))).start()
+    return x + 1
+"""
+    tests = [{"input_args": ["1"], "output": "2"}]
+    start = time.monotonic()
+    result_list = get_response(source, tests, check_timeout=True)
+    assert result_list[0].type == ResultType.TIMEOUT
+    assert time.monotonic() - start < TIMEOUT_SECONDS + 2
+
+
 def test_keyboard_interrupt_timeout():
     source = """
 def f(x):
@@ -54,3 +74,213 @@ def f(x):
     result_list = get_response(source, tests, check_timeout=True)
     assert len(result_list) == 1
     assert result_list[0].type == ResultType.TIMEOUT
+
+
+def test_single_execution_with_timeout(tmp_path):
+    log_path = tmp_path / "calls.txt"
+    source = f"""
+def f(x):
+    with open({str(log_path)!r}, "a") as f:
+        f.write("call\\n")
+    return x + 1
+"""
+    tests = [{"input_args": ["1"], "output": "2"}]
+    result_list = get_response(source, tests, check_timeout=True)
+    assert result_list[0].type == ResultType.SUCCESS
+    assert log_path.read_text() == "call\n"
+
+
+def test_mutated_args_with_timeout():
+    source = """
+def f(lst):
+    lst.append(42)
+"""
+    tests = [{"input_args": ["[]"], "output_args": ["[]"]}]
+    result_list = get_response(source, tests, check_timeout=True)
+    assert result_list[0].type == ResultType.FAIL
+    assert result_list[0].output_args == ["[42]"]
+    assert result_list[0].input_args == ["[]"]
+
+
+def test_unpicklable_output_with_timeout():
+    source = """
+def f(x):
+    return (i for i in range(x))
+"""
+    tests = [{"input_args": ["1"], "output": "2"}]
+    result_list = get_response(source, tests, check_timeout=True)
+    assert result_list[0].type == ResultType.FAIL
+
+
+def test_parallel_timeouts_keep_order():
+    source = """
+def f(x):
+    while x < 0:
+        pass
+    return x + 1
+"""
+    tests = [
+        {"input_args": ["-1"], "output": "0"},
+        {"input_args": ["1"], "output": "2"},
+        {"input_args": ["-2"], "output": "-1"},
+        {"input_args": ["2"], "output": "4"},
+    ]
+    start = time.monotonic()
+    result_list = get_response(source, tests, check_timeout=True, max_workers=4)
+    elapsed = time.monotonic() - start
+    assert [result.type for result in result_list] == [
+        ResultType.TIMEOUT,
+        ResultType.SUCCESS,
+        ResultType.TIMEOUT,
+        ResultType.FAIL,
+    ]
+    assert elapsed < 2 * TIMEOUT_SECONDS
+
+
+def test_inline_inner_timeout():
+    source = """
+def f(x):
+    while True:
+        pass
+"""
+    tests = [{"input_args": ["1"], "output": "2"}]
+    start = time.monotonic()
+    result_list = get_response(source, tests, check_timeout=True, execution_mode="inline")
+    assert result_list[0].type == ResultType.TIMEOUT
+    assert time.monotonic() - start < 2 * TIMEOUT_SECONDS
+
+
+def test_inline_falls_back_to_process_when_timeouts_may_be_caught():
+    source = """
+def f(x):
+    while True:
+        try:
+            while True:
+                pass
+        except BaseException:
+            pass
+"""
+    tests = [{"input_args": ["1"], "output": "2"}]
+    result_list = get_response(source, tests, check_timeout=True, execution_mode="inline")
+    assert result_list[0].type == ResultType.TIMEOUT
+
+
+def test_inline_success_and_errors():
+    source = """
+def f(lst):
+    lst.append(42)
+    return len(lst) / (len(lst) - 1)
+"""
+    tests = [
+        {"input_args": ["[1]"], "output_args": ["[1, 42]"], "output": "2.0"},
+        {"input_args": ["[]"], "output": "1"},
+    ]
+    result_list = get_response(source, tests, check_timeout=True, execution_mode="inline")
+    assert result_list[0].type == ResultType.SUCCESS
+    assert result_list[1].type == ResultType.RUNTIME_ERROR
+    assert result_list[1].error == "Line 3. ZeroDivisionError: division by zero"
+
+
+def test_inline_not_parallel():
+    source = """
+def f(x):
+    return x
+"""
+    tests = [{"input_args": ["1"], "output": "1"}]
+    with pytest.raises(ValueError, match="The 'inline' execution mode cannot run tests in parallel"):
+        get_response(source, tests, check_timeout=True, execution_mode="inline", max_workers=2)
+
+
+@pytest.mark.parametrize(
+    "check_timeout,execution_mode", [(False, "process"), (True, "process"), (True, "pool"), (True, "inline")]
+)
+def test_line_budget(check_timeout, execution_mode):
+    source = """
+def f(n):
+    total = 0
+    for i in range(n):
+        total += i
+    return total
+"""
+    tests = [
+        {"input_args": ["10"], "output": "45"},
+        {"input_args": ["10**9"], "output": "0"},
+    ]
+    start = time.monotonic()
+    result_list = get_response(
+        source, tests, check_timeout=check_timeout, execution_mode=execution_mode, line_budget=1000
+    )
+    assert [result.type for result in result_list] == [ResultType.SUCCESS, ResultType.TIMEOUT]
+    assert time.monotonic() - start < TIMEOUT_SECONDS
+
+
+def test_line_budget_counts_module_level_code():
+    source = """
+def f(x):
+    return x
+
+while True:
+    pass
+"""
+    tests = [{"input_args": ["1"], "output": "1"}]
+    result_list = get_response(source, tests, line_budget=1000)
+    assert result_list[0].type == ResultType.TIMEOUT
+
+
+def test_line_budget_is_deterministic():
+    source = """
+def f(n):
+    for i in range(n):
+        pass
+    return n
+"""
+    # The `def`, n + 1 loop headers, n loop bodies and the `return` make 2n + 3 lines.
+    tests = [{"input_args": ["499"], "output": "499"}, {"input_args": ["500"], "output": "500"}]
+    result_list = get_response(source, tests, check_timeout=True, line_budget=1001)
+    assert [result.type for result in result_list] == [ResultType.SUCCESS, ResultType.TIMEOUT]
+
+
+@pytest.mark.parametrize("execution_mode", ["process", "pool", "inline"])
+def test_module_level_timeout_is_detected_once(execution_mode):
+    source = """
+def f(x):
+    return x
+
+while True:
+    pass
+"""
+    tests = [{"input_args": [str(i)], "output": str(i)} for i in range(5)]
+    start = time.monotonic()
+    result_list = get_response(source, tests, check_timeout=True, execution_mode=execution_mode)
+    assert [result.type for result in result_list] == [ResultType.TIMEOUT] * 5
+    assert result_list[4].input_args == ["4"]
+    assert time.monotonic() - start < 2 * TIMEOUT_SECONDS
+
+
+def test_module_level_error_is_detected_once(tmp_path):
+    log_path = tmp_path / "calls.txt"
+    source = f"""
+def f(x):
+    return x
+
+with open({str(log_path)!r}, "a") as log:
+    log.write("module\\n")
+foo()
+"""
+    tests = [{"input_args": [str(i)], "output": str(i)} for i in range(3)]
+    result_list = get_response(source, tests, check_timeout=True)
+    assert [result.type for result in result_list] == [ResultType.RUNTIME_ERROR] * 3
+    assert result_list[2].error == "Line 6. NameError: name 'foo' is not defined"
+    assert log_path.read_text() == "module\n"
+
+
+def test_function_timeout_is_not_shared():
+    source = """
+def f(x):
+    while x:
+        pass
+    return x
+"""
+    tests = [{"input_args": ["1"], "output": "1"}, {"input_args": ["0"], "output": "0"}]
+    result_list = get_response(source, tests, check_timeout=True)
+    assert [result.type for result in result_list] == [ResultType.TIMEOUT, ResultType.SUCCESS]